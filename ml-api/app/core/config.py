@@ -0,0 +1,104 @@
+import os
+from dotenv import load_dotenv
+
+from app.models.backbones import DEFAULT_VARIANT, variant_paths
+
+load_dotenv()
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# A best_model.pth state_dict, or a single-file serving artifact written by
+# scripts/export_artifact.py (*.safetensors: weights + config + tokenizer,
+# no Hugging Face download at startup). Either is memory-mapped copy-on-write,
+# so uvicorn workers (--workers / WEB_CONCURRENCY) share the fp32 and bf16
+# weights through the page cache; int8 builds a quantized copy per worker.
+# MODEL_VARIANT ("full": BERT + ResNet50, "small": DistilBERT + ResNet18)
+# picks the default MODEL_PATH and the model_stats file /stats reports; the
+# towers themselves are read off the weights.
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", DEFAULT_VARIANT)
+MODEL_PATH = os.getenv("MODEL_PATH") or variant_paths(MODEL_VARIANT)[0]
+MODEL_STATS_PATH = os.getenv("MODEL_STATS_PATH") or variant_paths(MODEL_VARIANT)[1]
+# Longest token sequence fed to BERT; batches are padded only to their
+# longest member, so this is an upper bound rather than a fixed cost.
+MAX_SEQ_LEN = _env_int("MAX_SEQ_LEN", 128)
+# "torch" runs the PyTorch model from MODEL_PATH, "onnx" runs the graph
+# written by scripts/export_onnx.py on ONNX Runtime's CPU provider.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "model.onnx")
+ONNX_INTRA_OP_THREADS = _env_int("ONNX_INTRA_OP_THREADS", 0)
+# "fp32", "bf16" (CPU bf16 autocast, falls back to fp32 on CPUs without
+# AVX512-BF16/AMX) or "int8" (dynamic int8 Linear layers + static int8
+# ResNet, CPU only).
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+# Images used to calibrate the int8 ResNet tower; without them it stays fp32.
+QUANTIZE_CALIBRATION_DIR = os.getenv("QUANTIZE_CALIBRATION_DIR", "data/images")
+QUANTIZE_CALIBRATION_IMAGES = _env_int("QUANTIZE_CALIBRATION_IMAGES", 64)
+
+# Micro-batching: a batch is cut when it reaches BATCH_MAX_SIZE requests
+# or when the oldest queued request has waited BATCH_MAX_WAIT_MS.
+BATCH_MAX_SIZE = _env_int("BATCH_MAX_SIZE", 8)
+BATCH_MAX_WAIT_MS = _env_float("BATCH_MAX_WAIT_MS", 10.0)
+
+# Separate bounded pools per kind of blocking work, so a burst of slow
+# scrapes cannot starve inference or OCR (and vice versa).
+INFERENCE_POOL_SIZE = _env_int("INFERENCE_POOL_SIZE", 1)
+OCR_POOL_SIZE = _env_int("OCR_POOL_SIZE", 2)
+SCRAPE_POOL_SIZE = _env_int("SCRAPE_POOL_SIZE", 4)
+
+# Out-of-process inference: INFERENCE_PROCESSES > 0 runs the model in that
+# many worker processes, each pinned to its share of INFERENCE_CPUS (e.g.
+# "2-15"; default: every core) with INFERENCE_THREADS torch threads (0 = one
+# per pinned core). Cores outside INFERENCE_CPUS are left to the API
+# process, tesseract and the scraper. Request images travel through a
+# per-worker shared-memory slab of INFERENCE_SLAB_BYTES. A worker that takes
+# longer than INFERENCE_TIMEOUT_SECONDS on one batch fails it and is killed
+# and restarted in the background (/health shows the pool as degraded).
+INFERENCE_PROCESSES = _env_int("INFERENCE_PROCESSES", 0)
+INFERENCE_THREADS = _env_int("INFERENCE_THREADS", 0)
+INFERENCE_CPUS = os.getenv("INFERENCE_CPUS", "")
+INFERENCE_SLAB_BYTES = _env_int("INFERENCE_SLAB_BYTES", 32 * 1024 * 1024)
+INFERENCE_TIMEOUT_SECONDS = _env_float("INFERENCE_TIMEOUT_SECONDS", 30.0)
+
+# Scraper HTTP client: one long-lived keep-alive pool shared by all requests.
+SCRAPE_TOTAL_TIMEOUT = _env_float("SCRAPE_TOTAL_TIMEOUT", 20.0)
+SCRAPE_CONNECT_TIMEOUT = _env_float("SCRAPE_CONNECT_TIMEOUT", 5.0)
+SCRAPE_READ_TIMEOUT = _env_float("SCRAPE_READ_TIMEOUT", 10.0)
+SCRAPE_MAX_CONNECTIONS = _env_int("SCRAPE_MAX_CONNECTIONS", 100)
+SCRAPE_MAX_KEEPALIVE = _env_int("SCRAPE_MAX_KEEPALIVE", 20)
+SCRAPE_PER_HOST_LIMIT = _env_int("SCRAPE_PER_HOST_LIMIT", 6)
+
+# Scraped-article cache for /predict/url (memory LRU in front of a disk tier).
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "1") == "1"
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "data/scrape_cache")
+SCRAPE_CACHE_TTL_SECONDS = _env_float("SCRAPE_CACHE_TTL_SECONDS", 3600.0)
+# Oldest copy served when revalidation hits a network error or 5xx; older
+# entries are dropped.
+SCRAPE_CACHE_MAX_STALE_SECONDS = _env_float("SCRAPE_CACHE_MAX_STALE_SECONDS", 24 * 3600.0)
+SCRAPE_CACHE_MEMORY_ITEMS = _env_int("SCRAPE_CACHE_MEMORY_ITEMS", 256)
+SCRAPE_CACHE_MEMORY_BYTES = _env_int("SCRAPE_CACHE_MEMORY_BYTES", 64 * 1024 * 1024)
+SCRAPE_CACHE_DISK_BYTES = _env_int("SCRAPE_CACHE_DISK_BYTES", 1024 * 1024 * 1024)
+
+# Content-addressed cache of prediction results (0 disables it).
+PREDICTION_CACHE_SIZE = _env_int("PREDICTION_CACHE_SIZE", 4096)
+# Per-tower feature caches (text tower output keyed by token ids,
+# image tower feature keyed by image bytes), entries per tower.
+EMBEDDING_CACHE_SIZE = _env_int("EMBEDDING_CACHE_SIZE", 4096)
+
+# LLM summaries. GROQ_BASE_URL can point at a local stub (scripts/groq_stub.py).
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+LLM_TIMEOUT_SECONDS = _env_float("LLM_TIMEOUT_SECONDS", 15.0)
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 1)
+LLM_CACHE_SIZE = _env_int("LLM_CACHE_SIZE", 1024)
+# When set, /predict and /predict/url answer as soon as the label is known and
+# the summary is written to the scan later; clients poll GET /summary/{scan_id}
+# (the web app does so while it shows the result).
+LLM_DEFERRED_SUMMARIES = os.getenv("LLM_DEFERRED_SUMMARIES", "0") == "1"
@@ -1,8 +1,11 @@
 import os
+import asyncio
+import queue
+import threading
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
-from sqlalchemy import Column, String, Float, DateTime, func
+from sqlalchemy import Column, String, Float, DateTime, func, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
@@ -38,6 +41,42 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+_END = object()
+
+def iter_rows(query, fetch_size=5000):
+    """
+    Rows of `query` as dicts, for synchronous scripts. A background thread
+    streams them from Postgres on its own event loop while the caller
+    consumes them; an error there (connection, query) is re-raised here
+    instead of leaving the caller waiting on an empty queue.
+    """
+    rows = queue.Queue(maxsize=fetch_size * 2)
+
+    async def stream():
+        async with engine.connect() as conn:
+            result = await conn.stream(text(query).execution_options(yield_per=fetch_size))
+            async for row in result.mappings():
+                rows.put(dict(row))
+
+    def read():
+        try:
+            asyncio.run(stream())
+        except BaseException as e:
+            rows.put(e)
+        finally:
+            rows.put(_END)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    while True:
+        row = rows.get()
+        if row is _END:
+            break
+        if isinstance(row, BaseException):
+            raise row
+        yield row
+    reader.join()
+
 class Scan(Base):
     __tablename__ = "scans"
 
@@ -0,0 +1,43 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core import config
+
+POOL_SIZES = {
+    # One thread per in-flight batch; with worker processes each thread
+    # just waits on its worker.
+    "inference": max(config.INFERENCE_POOL_SIZE, config.INFERENCE_PROCESSES),
+    "ocr": config.OCR_POOL_SIZE,
+    "scrape": config.SCRAPE_POOL_SIZE,
+}
+
+_executors = {}
+
+
+def get_executor(kind):
+    """Return the bounded thread pool for one kind of blocking work."""
+    if kind not in POOL_SIZES:
+        raise ValueError(f"Unknown executor pool: {kind}")
+
+    executor = _executors.get(kind)
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, POOL_SIZES[kind]),
+            thread_name_prefix=f"{kind}-pool",
+        )
+        _executors[kind] = executor
+    return executor
+
+
+async def run_in_pool(kind, fn, *args, **kwargs):
+    """Run a blocking call on its pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(kind), call)
+
+
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
@@ -0,0 +1,34 @@
+import os
+
+
+def _read_kb(path, fields):
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except (OSError, ValueError):
+        pass
+    return values
+
+
+def process_memory():
+    """
+    Memory of this process in MB, from /proc (Linux only, None elsewhere).
+
+    rss counts every resident page, including weights that other workers map
+    too; pss splits shared pages evenly between the processes mapping them,
+    so summing pss over workers gives their real footprint.
+    """
+    status = _read_kb("/proc/self/status", {"VmRSS"})
+    if not status:
+        return None
+    rollup = _read_kb("/proc/self/smaps_rollup", {"Pss", "Shared_Clean", "Shared_Dirty"})
+
+    memory = {"pid": os.getpid(), "rss_mb": round(status["VmRSS"] / 1024, 1)}
+    if rollup:
+        memory["pss_mb"] = round(rollup.get("Pss", 0) / 1024, 1)
+        memory["shared_mb"] = round((rollup.get("Shared_Clean", 0) + rollup.get("Shared_Dirty", 0)) / 1024, 1)
+    return memory
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
@@ -7,31 +8,69 @@ from typing import List
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 from PIL import Image
+import asyncio
 import io
 import pytesseract
 import json
 import os
-
-from app.core.db import get_db, Scan
-from app.services.predictor import FakeNewsPredictor
-from app.services.scraper import scrape_article
-from app.services.llm import generate_summary
+import time
+
+from app.core import config
+from app.core.db import get_db, AsyncSessionLocal, Scan
+from app.core.executors import run_in_pool, shutdown_executors
+from app.core.memory import process_memory
+from app.services.batcher import InferenceBatcher
+from app.services.predictor import load_predictor
+from app.services.prediction_cache import PredictionCache, prediction_key
+from app.services.scraper import scrape_article, close_client
+from app.services.scrape_cache import ScrapeCache
+from app.services.llm import summary_service
 
 ml_models = {}
+background_tasks = set()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if config.SCRAPE_CACHE_ENABLED:
+        ml_models["scrape_cache"] = ScrapeCache(
+            directory=config.SCRAPE_CACHE_DIR,
+            ttl=config.SCRAPE_CACHE_TTL_SECONDS,
+            memory_entries=config.SCRAPE_CACHE_MEMORY_ITEMS,
+            memory_bytes=config.SCRAPE_CACHE_MEMORY_BYTES,
+            disk_bytes=config.SCRAPE_CACHE_DISK_BYTES,
+            max_stale=config.SCRAPE_CACHE_MAX_STALE_SECONDS,
+        )
+
     print(" Server Starting: Loading ML Model...")
+    started = time.perf_counter()
     try:
-        ml_models["predictor"] = FakeNewsPredictor(model_path="best_model.pth")
-        print(" Model Loaded Successfully!")
+        predictor = load_predictor()
+        batcher = InferenceBatcher(
+            predictor,
+            max_batch_size=config.BATCH_MAX_SIZE,
+            max_wait_ms=config.BATCH_MAX_WAIT_MS,
+            max_in_flight=predictor.concurrency,
+        )
+        await batcher.start()
+        ml_models["predictor"] = predictor
+        ml_models["batcher"] = batcher
+        if config.PREDICTION_CACHE_SIZE > 0:
+            ml_models["prediction_cache"] = PredictionCache(config.PREDICTION_CACHE_SIZE)
+        ml_models["startup_seconds"] = round(time.perf_counter() - started, 2)
+        print(f" Model Loaded Successfully! ({ml_models['startup_seconds']}s, memory: {process_memory()})")
     except Exception as e:
         print(f" Failed to load model: {e}")
     yield
+    if "batcher" in ml_models:
+        await ml_models["batcher"].stop()
+    if hasattr(ml_models.get("predictor"), "close"):
+        ml_models["predictor"].close()
     ml_models.clear()
+    await close_client()
+    shutdown_executors()
     print(" Server Shutting Down: Memory Cleared.")
 
 
@@ -46,14 +85,101 @@ app.add_middleware(
 )
 
 
+async def run_prediction(text, image_bytes):
+    """Score one (text, image) pair, serving repeats from the prediction cache."""
+    cache = ml_models.get("prediction_cache")
+    if cache is None:
+        return await ml_models["batcher"].predict(text, image_bytes)
+
+    model_version = ml_models["predictor"].model_version
+    key = prediction_key(text, image_bytes)
+    result = cache.get(model_version, key)
+    if result is None:
+        result = await ml_models["batcher"].predict(text, image_bytes)
+        cache.put(model_version, key, result)
+    return result
+
+
+async def attach_summary(result, text):
+    """Fill result["summary"] now, or mark it pending when summaries are deferred."""
+    if config.LLM_DEFERRED_SUMMARIES:
+        result["summary"] = None
+        result["summary_status"] = "pending"
+    else:
+        result["summary"] = await summary_service.summarize(
+            text, result["label"], result["confidence"]
+        )
+    return result
+
+
+async def fill_summary_later(scan_id, text, label, confidence):
+    summary = await summary_service.summarize(text, label, confidence)
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Scan).where(Scan.id == scan_id).values(summary=summary)
+            )
+            await session.commit()
+    except Exception as e:
+        print(f"Database Error (deferred summary): {e}")
+
+
+def schedule_summary(scan_id, text, result):
+    task = asyncio.create_task(
+        fill_summary_later(scan_id, text, result["label"], result["confidence"])
+    )
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def finish_scan(result, scan_id, text):
+    """
+    Point the client at the saved scan (scan_id None: saving it failed). A
+    deferred summary is only scheduled for a saved scan; otherwise
+    GET /summary/{scan_id} could never find it, so it is written inline.
+    """
+    if scan_id is None:
+        result["scan_id"] = None
+        if result.get("summary_status") == "pending":
+            result["summary"] = await summary_service.summarize(
+                text, result["label"], result["confidence"]
+            )
+            result["summary_status"] = "ready"
+        return result
+
+    if config.LLM_DEFERRED_SUMMARIES:
+        schedule_summary(scan_id, text, result)
+    result["scan_id"] = str(scan_id)
+    return result
+
+
 @app.get("/health")
 async def health_check():
-    return {
+    health = {
         "status": "ok",
         "service": "Fake News Detector API",
         "model_loaded": "predictor" in ml_models,
+        "model_variant": getattr(ml_models.get("predictor"), "model_variant", None),
         "timestamp": datetime.now().isoformat(),
     }
+    if "prediction_cache" in ml_models:
+        health["prediction_cache"] = ml_models["prediction_cache"].stats()
+    if "predictor" in ml_models and ml_models["predictor"].cache_stats():
+        health["embedding_cache"] = ml_models["predictor"].cache_stats()
+    pool_stats = getattr(ml_models.get("predictor"), "pool_stats", None)
+    if pool_stats:
+        health["inference_pool"] = pool_stats()
+        if health["inference_pool"]["degraded"]:
+            health["status"] = "degraded"
+    # Per worker: with several uvicorn workers, each request lands on one of
+    # them, so poll a few times to see them all.
+    health["worker"] = {"startup_seconds": ml_models.get("startup_seconds"), "memory": process_memory()}
+    return health
+
+def extract_image_text(image_bytes):
+    pil_image = Image.open(io.BytesIO(image_bytes))
+    return pytesseract.image_to_string(pil_image)
+
 
 class ScanSchema(BaseModel):
     id: UUID
@@ -85,9 +211,7 @@ async def predict_news(
     if not text or text.strip() == "":
         try:
             print(" No text provided. Scanning image for text...")
-            pil_image = Image.open(io.BytesIO(image_bytes))
-
-            ocr_text = pytesseract.image_to_string(pil_image)
+            ocr_text = await run_in_pool("ocr", extract_image_text, image_bytes)
 
             text = ocr_text.strip()
             print(f" OCR Extracted: '{text[:100]}...'")
@@ -104,17 +228,18 @@ async def predict_news(
             )
 
     try:
-        result = ml_models["predictor"].predict(text, image_bytes)
-        summary = generate_summary(text, result["label"], result["confidence"])
-        result["summary"] = summary
+        result = await run_prediction(text, image_bytes)
+        await attach_summary(result, text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    scan_id = uuid4()
     try:
         display_text = text[:200] + "..." if len(text) > 200 else text
         label_prefix = "[OCR] " if not text else ""
 
         new_scan = Scan(
+            id=scan_id,
             user_id=user_id,
             text=f"{label_prefix}{display_text}",
             label=result["label"],
@@ -123,9 +248,12 @@ async def predict_news(
         )
         db.add(new_scan)
         await db.commit()
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"Database Error: {e}")
+        await db.rollback()
+        scan_id = None
 
+    await finish_scan(result, scan_id, text)
     result["scraped_headline"] = text
     return result
 
@@ -142,10 +270,23 @@ async def get_history(user_id: str, db: AsyncSession = Depends(get_db)):
     scans = result.scalars().all()
     return scans
 
+@app.get("/summary/{scan_id}")
+async def get_summary(scan_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Poll for a summary that was deferred by LLM_DEFERRED_SUMMARIES"""
+    scan = await db.get(Scan, scan_id)
+    if scan is None:
+        raise HTTPException(status_code=404, detail="Scan not found.")
+
+    return {
+        "scan_id": str(scan.id),
+        "summary": scan.summary,
+        "summary_status": "ready" if scan.summary else "pending",
+    }
+
 @app.get("/stats")
 async def get_model_stats():
     try:
-        with open("model_stats.json", "r") as f:
+        with open(config.MODEL_STATS_PATH, "r") as f:
             data = json.load(f)
         return data
     except FileNotFoundError:
@@ -161,7 +302,10 @@ class URLRequest(BaseModel):
 
 @app.post("/predict/url")
 async def predict_url(request: URLRequest, db: AsyncSession = Depends(get_db)):
-    headline, article_text, image_bytes = scrape_article(request.url)
+    if "scrape_cache" in ml_models:
+        headline, article_text, image_bytes = await ml_models["scrape_cache"].scrape_article(request.url)
+    else:
+        headline, article_text, image_bytes = await scrape_article(request.url)
 
     if not headline or not article_text or not image_bytes:
         raise HTTPException(
@@ -185,21 +329,19 @@ async def predict_url(request: URLRequest, db: AsyncSession = Depends(get_db)):
         if "predictor" not in ml_models:
             raise HTTPException(status_code=503, detail="Model is not loaded.")
 
-        result = ml_models["predictor"].predict(article_text, image_bytes)
-
-        summary = generate_summary(
-            article_text[:3000], result["label"], result["confidence"]
-        )
-        result["summary"] = summary
+        result = await run_prediction(article_text, image_bytes)
+        await attach_summary(result, article_text[:3000])
 
     except Exception as e:
         print(f"Prediction Error: {e}")
         raise HTTPException(status_code=500, detail=f"AI Processing Failed: {str(e)}")
 
+    scan_id = uuid4()
     try:
         display_text = headline[:200] + "..." if len(headline) > 200 else headline
 
         new_scan = Scan(
+            id=scan_id,
             user_id=request.user_id,
             text=f"[URL] {display_text}",
             label=result["label"],
@@ -210,7 +352,9 @@ async def predict_url(request: URLRequest, db: AsyncSession = Depends(get_db)):
         await db.commit()
     except Exception as e:
         print(f"Database Error: {e}")
-        pass
+        await db.rollback()
+        scan_id = None
 
+    await finish_scan(result, scan_id, article_text[:3000])
     result["scraped_headline"] = headline
     return result
@@ -0,0 +1,127 @@
+import json
+import os
+import struct
+
+import torch
+
+from app.models.backbones import backbones_of_state_dict
+from app.models.classifier import FakeNewsClassifier
+
+ARTIFACT_FORMAT = "fakenews-classifier/1"
+ARTIFACT_SUFFIX = ".safetensors"
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def is_artifact(path):
+    return path.endswith(ARTIFACT_SUFFIX)
+
+
+def save_artifact(model, tokenizer, path, **extra):
+    """
+    Write a single-file serving artifact: every weight of `model` as a
+    safetensors tensor, plus its backbone names, the text tower's config and
+    the fast tokenizer's JSON in the header metadata, so loading needs no
+    Hugging Face download at all.
+    """
+    from safetensors.torch import save_file
+
+    state_dict = {name: tensor.contiguous() for name, tensor in model.state_dict().items()}
+    metadata = {
+        "format": ARTIFACT_FORMAT,
+        "text_backbone": model.text_backbone,
+        "image_backbone": model.image_backbone,
+        "text_config": model.bert.config.to_json_string(),
+        "tokenizer": tokenizer.backend_tokenizer.to_str(),
+    }
+    metadata.update({key: str(value) for key, value in extra.items()})
+    # Servers memory-map the artifact, so write a new file and rename it
+    # into place rather than rewriting the mapped one.
+    tmp_path = f"{path}.tmp"
+    save_file(state_dict, tmp_path, metadata=metadata)
+    os.replace(tmp_path, path)
+
+
+def mmap_safetensors(path):
+    """
+    Tensors of a safetensors file as views into a single copy-on-write
+    memory map of it. Nothing is copied, so every process that maps the
+    same file (e.g. each uvicorn worker) shares the weights' pages through
+    the page cache instead of holding its own copy.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    # shared=False maps the file copy-on-write: pages stay shared as long as
+    # nobody writes to the weights, and writes never reach the file.
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data = torch.empty(0, dtype=torch.uint8).set_(storage)
+    base = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        raw = data[base + start:base + end]
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        try:
+            tensor = raw.view(dtype)
+        except RuntimeError:
+            # Misaligned for its dtype (only small tensors such as BatchNorm
+            # counters end up here), so copy it.
+            tensor = raw.clone().view(dtype)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+
+def load_artifact(path):
+    """
+    Returns (model, tokenizer) from an artifact written by save_artifact.
+
+    The model skeleton is built from the stored config without pretrained
+    weights, then takes the memory-mapped tensors as its parameters
+    (assign=True), so the weights are read once, lazily, by the page cache.
+    """
+    from safetensors import safe_open
+    from tokenizers import Tokenizer
+    from transformers import BertTokenizerFast
+
+    with safe_open(path, framework="pt") as f:
+        metadata = f.metadata() or {}
+    if metadata.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact (format={metadata.get('format')!r})")
+
+    model = FakeNewsClassifier(
+        pretrained=False,
+        text_config=json.loads(metadata["text_config"]),
+        text_backbone=metadata["text_backbone"],
+        image_backbone=metadata["image_backbone"],
+    )
+    model.load_state_dict(mmap_safetensors(path), assign=True)
+
+    tokenizer = BertTokenizerFast(tokenizer_object=Tokenizer.from_str(metadata["tokenizer"]))
+    return model, tokenizer
+
+
+def load_checkpoint_weights(model_path, map_location="cpu"):
+    """
+    Build FakeNewsClassifier from a best_model.pth state_dict in one load;
+    the backbones are read off the state_dict's keys.
+    """
+    state_dict = torch.load(model_path, map_location=map_location, mmap=True)
+    text_backbone, image_backbone = backbones_of_state_dict(state_dict)
+    model = FakeNewsClassifier(pretrained=False, text_backbone=text_backbone, image_backbone=image_backbone)
+    model.load_state_dict(state_dict, assign=True)
+    return model
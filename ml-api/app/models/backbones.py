@@ -0,0 +1,115 @@
+import contextlib
+
+# Nothing heavy is imported at module level: app.core.config reads
+# MODEL_VARIANTS, and the towers import transformers/torchvision on demand.
+
+# distilbert-base-uncased shares bert-base-uncased's vocabulary, so one
+# tokenizer (and one pre-tokenized store) serves every text tower.
+TOKENIZER_NAME = 'bert-base-uncased'
+
+
+def _bert_classes():
+    from transformers import BertConfig, BertModel
+    return BertConfig, BertModel
+
+
+def _distilbert_classes():
+    from transformers import DistilBertConfig, DistilBertModel
+    return DistilBertConfig, DistilBertModel
+
+
+# name -> (config/model classes, feature size, how a sequence is pooled).
+# "pooler" is BERT's tanh pooler output; DistilBERT has none, so it uses the
+# [CLS] position of the last hidden state.
+TEXT_TOWERS = {
+    'bert-base-uncased': (_bert_classes, 768, "pooler"),
+    'distilbert-base-uncased': (_distilbert_classes, 768, "cls"),
+}
+
+# torchvision constructor name -> feature size after global average pooling.
+IMAGE_TOWERS = {
+    'resnet50': 2048,
+    'resnet18': 512,
+}
+
+# Named (text tower, image tower) pairs that train.py and the predictor know.
+# Each variant trains into and serves from its own files (see variant_paths).
+MODEL_VARIANTS = {
+    "full": {"text_backbone": 'bert-base-uncased', "image_backbone": 'resnet50', "label": "ResNet50 + BERT (v1.1)"},
+    "small": {"text_backbone": 'distilbert-base-uncased', "image_backbone": 'resnet18', "label": "ResNet18 + DistilBERT (v1.1)"},
+}
+DEFAULT_VARIANT = "full"
+
+
+def _skip_weight_init():
+    """Skip the transformer's random init when every weight is about to be overwritten."""
+    try:
+        from transformers.modeling_utils import no_init_weights
+    except ImportError:
+        return contextlib.nullcontext()
+    return no_init_weights()
+
+
+def build_text_tower(name, pretrained=True, config=None):
+    """
+    The Hugging Face encoder for text tower `name`. Without `pretrained`
+    it is built from `config` (a config object or its dict; defaults to
+    the pretrained model's own config) and nothing is downloaded.
+    """
+    if name not in TEXT_TOWERS:
+        raise ValueError(f"Unknown text backbone '{name}', expected one of {sorted(TEXT_TOWERS)}")
+    config_class, model_class = TEXT_TOWERS[name][0]()
+
+    if pretrained:
+        return model_class.from_pretrained(name)
+    if isinstance(config, dict):
+        config = config_class(**config)
+    with _skip_weight_init():
+        return model_class(config or config_class())
+
+
+def build_image_tower(name, pretrained=True):
+    """The ResNet trunk for image tower `name`, without its fc layer."""
+    import torch.nn as nn
+    from torchvision import models
+
+    if name not in IMAGE_TOWERS:
+        raise ValueError(f"Unknown image backbone '{name}', expected one of {sorted(IMAGE_TOWERS)}")
+    resnet = getattr(models, name)(pretrained=pretrained)
+    return nn.Sequential(*list(resnet.children())[:-1])
+
+
+def variant_backbones(variant):
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {sorted(MODEL_VARIANTS)}")
+    spec = MODEL_VARIANTS[variant]
+    return spec["text_backbone"], spec["image_backbone"]
+
+
+def variant_paths(variant):
+    """(weights, stats) files of a variant; "full" keeps the original names."""
+    variant_backbones(variant)
+    suffix = "" if variant == DEFAULT_VARIANT else f"_{variant}"
+    return f"best_model{suffix}.pth", f"model_stats{suffix}.json"
+
+
+def variant_name(text_backbone, image_backbone):
+    """The MODEL_VARIANTS name for a pair of towers, or None for a custom pair."""
+    for name, spec in MODEL_VARIANTS.items():
+        if (spec["text_backbone"], spec["image_backbone"]) == (text_backbone, image_backbone):
+            return name
+    return None
+
+
+def backbones_of_state_dict(state_dict):
+    """
+    Work out which towers a FakeNewsClassifier state_dict was trained with,
+    so a plain best_model.pth needs no side file to be loaded.
+    """
+    text_backbone = (
+        'distilbert-base-uncased' if any(key.startswith("bert.transformer.") for key in state_dict)
+        else 'bert-base-uncased'
+    )
+    # Bottleneck blocks (ResNet50) have a third conv, basic blocks (ResNet18) do not.
+    image_backbone = 'resnet50' if "resnet_features.4.0.conv3.weight" in state_dict else 'resnet18'
+    return text_backbone, image_backbone
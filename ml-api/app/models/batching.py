@@ -0,0 +1,126 @@
+import random
+
+import torch
+from torch.utils.data import Sampler
+
+from app.models.image_store import normalize_images
+
+
+def default_buckets(max_seq_len, smallest=16):
+    """Power-of-two length buckets up to max_seq_len, e.g. 16, 32, 64, 128."""
+    buckets = []
+    size = smallest
+    while size < max_seq_len:
+        buckets.append(size)
+        size *= 2
+    buckets.append(max_seq_len)
+    return buckets
+
+
+def group_by_bucket(lengths, buckets):
+    """Group row indices by the smallest bucket that fits each length."""
+    groups = {}
+    for i, length in enumerate(lengths):
+        bucket = next((b for b in buckets if length <= b), buckets[-1])
+        groups.setdefault(bucket, []).append(i)
+    return [groups[b] for b in sorted(groups)]
+
+
+def pad_sequences(sequences, pad_token_id=0):
+    """Pad variable-length token id sequences to the longest one in the batch."""
+    longest = max(len(seq) for seq in sequences)
+    input_ids = torch.full((len(sequences), longest), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), longest), dtype=torch.long)
+
+    for i, seq in enumerate(sequences):
+        input_ids[i, :len(seq)] = torch.as_tensor(seq, dtype=torch.long)
+        attention_mask[i, :len(seq)] = 1
+    return input_ids, attention_mask
+
+
+def pad_collate(batch, pad_token_id=0):
+    """
+    DataLoader collate_fn for FakeNewsDataset items with unpadded input_ids.
+    uint8 images (from an ImageShardStore) are normalized here for the
+    whole batch; missing images become all-zero tensors, as before.
+    """
+    input_ids, attention_mask = pad_sequences(
+        [item['input_ids'] for item in batch], pad_token_id
+    )
+
+    images = torch.stack([item['image'] for item in batch])
+    if images.dtype == torch.uint8:
+        images = normalize_images(images)
+        missing = torch.tensor([item.get('image_missing', False) for item in batch])
+        images[missing] = 0.0
+
+    return {
+        'image': images,
+        'input_ids': input_ids,
+        'attention_mask': attention_mask,
+        'label': torch.stack([item['label'] for item in batch]),
+        'id': [item['id'] for item in batch],
+    }
+
+
+class LengthBucketBatchSampler(Sampler):
+    """
+    Yields batches of indices whose sequence lengths are close together, so
+    dynamic padding wastes little compute.
+
+    Indices are shuffled, cut into pools of `batch_size * pool_batches`,
+    sorted by length inside each pool and split into batches; the batch
+    order is then shuffled again. With shuffle=False the whole dataset is
+    simply sorted by length (useful for validation).
+
+    The order depends only on `seed` and the epoch, so `skip_batches` can
+    resume an epoch part-way through without loading the skipped batches.
+    """
+
+    def __init__(self, lengths, batch_size, shuffle=True, pool_batches=50, drop_last=False, seed=0):
+        self.lengths = list(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.pool_size = batch_size * pool_batches
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        self.start_batch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self.start_batch = 0
+
+    def skip_batches(self, count):
+        """Start the current epoch at batch `count` instead of 0."""
+        self.start_batch = count
+
+    def __iter__(self):
+        indices = list(range(len(self.lengths)))
+        rng = random.Random(self.seed + self.epoch)
+
+        if self.shuffle:
+            rng.shuffle(indices)
+            pools = [indices[i:i + self.pool_size] for i in range(0, len(indices), self.pool_size)]
+        else:
+            pools = [indices]
+
+        batches = []
+        for pool in pools:
+            pool.sort(key=lambda i: self.lengths[i])
+            for i in range(0, len(pool), self.batch_size):
+                batch = pool[i:i + self.batch_size]
+                if len(batch) < self.batch_size and self.drop_last:
+                    continue
+                batches.append(batch)
+
+        if self.shuffle:
+            rng.shuffle(batches)
+        return iter(batches[self.start_batch:])
+
+    def __len__(self):
+        if self.drop_last:
+            batches = len(self.lengths) // self.batch_size
+        else:
+            batches = (len(self.lengths) + self.batch_size - 1) // self.batch_size
+        return max(batches - self.start_batch, 0)
@@ -0,0 +1,98 @@
+import os
+import random
+import threading
+
+import numpy as np
+import torch
+
+
+def to_cpu(obj):
+    """Detached CPU copy of every tensor in a (nested) state dict."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_cpu(value) for value in obj)
+    return obj
+
+
+def capture_rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def save_atomic(state, path):
+    """
+    torch.save `state` to `<path>.tmp` and rename it over `path`. The server
+    memory-maps the model files, so they must never be rewritten in place:
+    readers keep the old inode until they reload, and a crash mid-write
+    leaves the previous file intact.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    # Checkpoints hold optimizer and RNG state, not just tensors.
+    return torch.load(path, map_location="cpu", weights_only=False)
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints on a background thread so training does not wait on
+    disk. `save` copies the state to CPU right away (training keeps mutating
+    the live tensors) and returns; each file is written to `<path>.tmp` and
+    renamed into place, so a crash mid-write never leaves a truncated file.
+
+    At most one write is in flight: a `save` issued while the previous one
+    is still running waits for it first, which bounds the extra memory to a
+    single copy of the state.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._error = None
+
+    def save(self, files):
+        """Write `{path: state}` in the background."""
+        self.wait()
+        files = {path: to_cpu(state) for path, state in files.items()}
+        self._thread = threading.Thread(
+            target=self._write, args=(files,), name="checkpoint-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _write(self, files):
+        try:
+            for path, state in files.items():
+                save_atomic(state, path)
+        except Exception as e:  # re-raised on the training thread by wait()
+            self._error = e
+
+    def wait(self):
+        """Block until the pending write (if any) is on disk."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
@@ -1,34 +1,85 @@
 import torch
 import torch.nn as nn
-from transformers import BertModel
-from torchvision import models
+
+from app.models.backbones import (
+    IMAGE_TOWERS, MODEL_VARIANTS, TEXT_TOWERS, build_image_tower, build_text_tower, variant_backbones, variant_name,
+)
+
 
 class FakeNewsClassifier(nn.Module):
-    def __init__(self):
+    """
+    Text tower + image tower + MLP head. The towers come from the registries
+    in app.models.backbones; the default is BERT-base + ResNet50, and
+    `FakeNewsClassifier.from_variant("small")` is DistilBERT + ResNet18.
+
+    pretrained=True starts from the pretrained tower weights (training).
+    pretrained=False only builds the architecture, from `text_config` (a
+    config or its dict; defaults to the pretrained model's), without
+    downloading anything or running the transformer's weight init, for
+    callers that load a full checkpoint right after.
+    """
+
+    def __init__(self, pretrained=True, text_config=None,
+                 text_backbone='bert-base-uncased', image_backbone='resnet50'):
         super(FakeNewsClassifier, self).__init__()
-        
-        self.bert = BertModel.from_pretrained('bert-base-uncased')
-        
-        resnet = models.resnet50(pretrained=True)
-        self.resnet_features = nn.Sequential(*list(resnet.children())[:-1]) 
-        
+        self.text_backbone = text_backbone
+        self.image_backbone = image_backbone
+        _, text_dim, self.text_pooling = TEXT_TOWERS[text_backbone]
+        image_dim = IMAGE_TOWERS[image_backbone]
+
+        # Attribute names predate the registry; keeping them keeps every
+        # existing best_model.pth loadable.
+        self.bert = build_text_tower(text_backbone, pretrained, text_config)
+        self.resnet_features = build_image_tower(image_backbone, pretrained)
+
         self.classifier = nn.Sequential(
-            nn.Linear(768 + 2048, 512),
+            nn.Linear(text_dim + image_dim, 512),
             nn.ReLU(),
             nn.Dropout(0.3),
             nn.Linear(512, 128),
             nn.ReLU(),
-            nn.Linear(128, 2) 
+            nn.Linear(128, 2)
         )
 
-    def forward(self, input_ids, attention_mask, images):
+    @classmethod
+    def from_variant(cls, variant, **kwargs):
+        text_backbone, image_backbone = variant_backbones(variant)
+        return cls(text_backbone=text_backbone, image_backbone=image_backbone, **kwargs)
+
+    @property
+    def variant(self):
+        return variant_name(self.text_backbone, self.image_backbone)
 
-        text_out = self.bert(input_ids=input_ids, attention_mask=attention_mask)[1] 
-        
-        image_out = self.resnet_features(images) 
-        image_out = image_out.view(image_out.size(0), -1) 
-        
+    def describe(self):
+        """model_stats.json fields identifying the architecture."""
+        variant = self.variant
+        label = MODEL_VARIANTS[variant]["label"] if variant else f"{self.image_backbone} + {self.text_backbone}"
+        return {
+            "model_version": label,
+            "model_variant": variant or "custom",
+            "text_backbone": self.text_backbone,
+            "image_backbone": self.image_backbone,
+        }
+
+    def encode_text(self, input_ids, attention_mask):
+        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+        if self.text_pooling == "pooler":
+            return outputs[1]
+        return outputs[0][:, 0]
+
+    def encode_image(self, images):
+        image_out = self.resnet_features(images)
+        return image_out.view(image_out.size(0), -1)
+
+    def classify(self, text_out, image_out):
         combined = torch.cat((text_out, image_out), dim=1)
-        
-        logits = self.classifier(combined)
-        return logits
\ No newline at end of file
+        return self.classifier(combined)
+
+    def forward(self, input_ids, attention_mask, images):
+
+        text_out = self.encode_text(input_ids, attention_mask)
+
+        image_out = self.encode_image(images)
+
+        logits = self.classify(text_out, image_out)
+        return logits
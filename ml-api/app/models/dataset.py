@@ -1,53 +1,147 @@
 import os
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, Subset, get_worker_info
 from PIL import Image
-from transformers import BertTokenizer
+from transformers import BertTokenizerFast
+
+from app.models.backbones import TOKENIZER_NAME
+from app.models.snapshot import TRAINING_COLUMNS, load_snapshot_rows
+
+TOKENIZE_CHUNK = 1024
+
+
+def load_image(image_dir, row_id, transform=None):
+    image_path = os.path.join(image_dir, f"{row_id}.jpg")
+
+    try:
+        image = Image.open(image_path).convert('RGB')
+        if transform:
+            image = transform(image)
+    except (FileNotFoundError, OSError):
+        image = torch.zeros((3, 224, 224))
+    return image
+
+
+def worker_init_fn(worker_id):
+    """
+    DataLoader worker_init_fn. Drops the tokenizer the worker inherited from
+    the parent so it builds its own on first use, and limits torch to one
+    thread so N workers don't oversubscribe the CPU the training step uses.
+    """
+    torch.set_num_threads(1)
+    dataset = get_worker_info().dataset
+    while isinstance(dataset, Subset):
+        dataset = dataset.dataset
+    if hasattr(dataset, "reset_tokenizer"):
+        dataset.reset_tokenizer()
+
+
+def make_item(row, token_ids, image, image_missing=False):
+    input_ids = torch.as_tensor(token_ids)
+    label = 1 if row['label'] == 'fake' else 0
+
+    return {
+        'image': image,
+        'image_missing': image_missing,
+        'input_ids': input_ids,
+        'attention_mask': torch.ones_like(input_ids),
+        'label': torch.tensor(label, dtype=torch.long),
+        'id': str(row['id'])
+    }
+
 
 class FakeNewsDataset(Dataset):
-    def __init__(self, data_rows, image_dir, transform=None, max_len=128):
-        print("DEBUG: Loading Updated FakeNewsDataset Class...") 
+    """
+    Items carry unpadded `input_ids`; batch them with
+    app.models.batching.pad_collate, which pads to the longest item.
+
+    Text is tokenized once, in batches, the first time it is needed. Rows
+    found in `token_store` (see scripts/pretokenize.py) are read straight
+    from its memory map instead.
+
+    With an `image_store` (see scripts/build_image_shards.py) images come
+    from the preprocessed uint8 shards and `transform` is not used;
+    pad_collate normalizes them a batch at a time.
+    """
+
+    def __init__(self, data_rows, image_dir, transform=None, max_len=128, token_store=None, image_store=None):
+        print("DEBUG: Loading Updated FakeNewsDataset Class...")
         self.data_rows = data_rows
         self.image_dir = image_dir
         self.transform = transform
         self.max_len = max_len
-        
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+
+        if token_store is not None and (
+            token_store.max_len != max_len or token_store.tokenizer_name != TOKENIZER_NAME
+        ):
+            print(f" Token store was built with {token_store.tokenizer_name}/max_len={token_store.max_len}, ignoring it.")
+            token_store = None
+        self.token_store = token_store
+        self.image_store = image_store
+
+        self._tokenizer = None
+        self._token_ids = None
+
+    @property
+    def tokenizer(self):
+        # Created on first use rather than in __init__, so DataLoader workers
+        # each get their own instead of sharing one across fork.
+        if self._tokenizer is None:
+            self._tokenizer = BertTokenizerFast.from_pretrained(TOKENIZER_NAME)
+        return self._tokenizer
+
+    def reset_tokenizer(self):
+        self._tokenizer = None
+
+    @classmethod
+    def from_snapshot(cls, path, image_dir, **kwargs):
+        """Build the dataset from a Parquet snapshot (see scripts/export_snapshot.py)."""
+        return cls(load_snapshot_rows(path, TRAINING_COLUMNS), image_dir, **kwargs)
 
     def __len__(self):
         return len(self.data_rows)
 
+    def _encode_all(self):
+        token_ids = [None] * len(self.data_rows)
+        missing = []
+        for i, row in enumerate(self.data_rows):
+            if self.token_store is not None and row['id'] in self.token_store:
+                token_ids[i] = self.token_store.get(row['id'])
+            else:
+                missing.append(i)
+
+        for start in range(0, len(missing), TOKENIZE_CHUNK):
+            chunk = missing[start:start + TOKENIZE_CHUNK]
+            encodings = self.tokenizer(
+                [self.data_rows[i]['text'] for i in chunk],
+                add_special_tokens=True,
+                max_length=self.max_len,
+                truncation=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )
+            for i, ids in zip(chunk, encodings['input_ids']):
+                token_ids[i] = ids
+
+        if self.token_store is not None:
+            print(f" Token store hits: {len(token_ids) - len(missing)}, tokenized: {len(missing)}")
+        return token_ids
+
+    def token_ids(self, idx):
+        if self._token_ids is None:
+            self._token_ids = self._encode_all()
+        return self._token_ids[idx]
+
+    def lengths(self):
+        """Token count of every row (after truncation), for length bucketing."""
+        return [len(self.token_ids(i)) for i in range(len(self.data_rows))]
+
     def __getitem__(self, idx):
         row = self.data_rows[idx]
-        row_id = row['id']
-        text = row['text']
-        
-        label = 1 if row['label'] == 'fake' else 0
-        
-        image_path = os.path.join(self.image_dir, f"{row_id}.jpg") 
-        
-        try:
-            image = Image.open(image_path).convert('RGB')
-            if self.transform:
-                image = self.transform(image)
-        except (FileNotFoundError, OSError):
-            image = torch.zeros((3, 224, 224))
-            
-        encoding = self.tokenizer.encode_plus(
-            text,
-            add_special_tokens=True,
-            max_length=self.max_len,
-            return_token_type_ids=False,
-            padding='max_length',
-            truncation=True,
-            return_attention_mask=True,
-            return_tensors='pt',
-        )
-
-        return {
-            'image': image,
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'label': torch.tensor(label, dtype=torch.long),
-            'id': str(row_id) 
-        }
\ No newline at end of file
+
+        if self.image_store is not None:
+            image, image_missing = self.image_store.get(row['id'], self.image_dir)
+        else:
+            image, image_missing = load_image(self.image_dir, row['id'], self.transform), False
+
+        return make_item(row, self.token_ids(idx), image, image_missing)
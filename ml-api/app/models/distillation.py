@@ -0,0 +1,157 @@
+import json
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from tqdm import tqdm
+
+from app.models.precision import autocast
+
+LOGITS_FILE = "teacher_logits.npy"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+
+def teacher_fingerprint(model_path):
+    """Identity of the teacher's weight file; cached logits are only reused for the same file."""
+    stat = os.stat(model_path)
+    return f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class TeacherLogitStore:
+    """
+    The frozen teacher's logits for every training row:
+
+    - teacher_logits.npy  N×2  raw (pre-softmax) teacher logits (float32)
+    - ids.json            dataset_samples.id for each row
+
+    The teacher runs once per (teacher weights, rows); every student epoch
+    after that reads its soft targets from here instead of running BERT and
+    ResNet50 again.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, IDS_FILE)) as f:
+            self.ids = json.load(f)
+        self.logits = np.load(os.path.join(directory, LOGITS_FILE), mmap_mode="r")
+        self.index = {row_id: i for i, row_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def covers(self, row_ids, meta):
+        """True when every row id is present and the logits came from the same teacher."""
+        return self.meta == meta and all(str(row_id) in self.index for row_id in row_ids)
+
+    def tensor(self, row_ids):
+        """Teacher logits for `row_ids`, in that order."""
+        rows = [self.index[str(row_id)] for row_id in row_ids]
+        return torch.from_numpy(np.ascontiguousarray(self.logits[rows]))
+
+    @staticmethod
+    def extract(teacher, loader, directory, device, meta, precision="fp32"):
+        """Run the teacher once over `loader` and write its logits."""
+        os.makedirs(directory, exist_ok=True)
+        teacher.eval()
+
+        ids, chunks = [], []
+        with torch.no_grad():
+            for batch in tqdm(loader, desc="Teacher logits"):
+                with autocast(device, precision):
+                    logits = teacher(
+                        batch['input_ids'].to(device),
+                        batch['attention_mask'].to(device),
+                        batch['image'].to(device),
+                    )
+                ids.extend(batch['id'])
+                chunks.append(logits.float().cpu().numpy())
+
+        np.save(os.path.join(directory, LOGITS_FILE), np.concatenate(chunks))
+        with open(os.path.join(directory, IDS_FILE), "w") as f:
+            json.dump([str(row_id) for row_id in ids], f)
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump(meta, f, indent=4)
+
+        return TeacherLogitStore(directory)
+
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature, alpha):
+    """
+    alpha * soft-target loss + (1 - alpha) * hard-label cross entropy.
+
+    The soft term is the KL divergence between the temperature-softened
+    teacher and student distributions, scaled by temperature² so its
+    gradients stay comparable to the hard term's as the temperature changes.
+    """
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.softmax(teacher_logits / temperature, dim=1),
+        reduction="batchmean",
+    ) * temperature ** 2
+    hard = F.cross_entropy(student_logits, labels)
+    return alpha * soft + (1 - alpha) * hard
+
+
+def _sync(device):
+    # CUDA kernels run asynchronously; wait for them before reading the clock.
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+
+def measure(model, loader, device, precision="fp32", single_requests=32, warmup=3):
+    """
+    Accuracy and CPU/GPU latency of `model` on `loader`:
+
+    - accuracy and ms_per_sample from one batched pass over the whole loader,
+      timing only the forward passes (not image decoding or loader waits)
+    - ms_per_request from `single_requests` batch-of-one forwards (what a
+      lone /predict call pays), after `warmup` untimed ones
+    """
+    model.eval()
+    correct = total = 0
+    singles = []
+
+    batched_seconds = 0.0
+    with torch.no_grad(), autocast(device, precision):
+        for batch in loader:
+            input_ids = batch['input_ids'].to(device)
+            attention_mask = batch['attention_mask'].to(device)
+            images = batch['image'].to(device)
+            labels = batch['label'].to(device)
+
+            _sync(device)
+            start = time.perf_counter()
+            outputs = model(input_ids, attention_mask, images)
+            _sync(device)
+            batched_seconds += time.perf_counter() - start
+
+            predicted = outputs.argmax(dim=1)
+            correct += (predicted == labels).sum().item()
+            total += labels.size(0)
+
+            for i in range(labels.size(0)):
+                if len(singles) < single_requests + warmup:
+                    # Unpadded, as a lone request would be tokenized.
+                    length = int(attention_mask[i].sum())
+                    singles.append((input_ids[i:i + 1, :length], attention_mask[i:i + 1, :length], images[i:i + 1]))
+
+        timings = []
+        for n, inputs in enumerate(singles):
+            _sync(device)
+            start = time.perf_counter()
+            model(*inputs)
+            _sync(device)
+            if n >= warmup:
+                timings.append(time.perf_counter() - start)
+
+    return {
+        "accuracy": round(100 * correct / total, 2),
+        "ms_per_sample": round(1000 * batched_seconds / total, 2),
+        "ms_per_request": round(1000 * float(np.median(timings)), 2) if timings else None,
+        "parameters": sum(p.numel() for p in model.parameters()),
+    }
@@ -0,0 +1,74 @@
+import os
+
+import torch
+import torch.distributed as dist
+
+
+def init_distributed():
+    """
+    Join the process group when launched by torchrun (WORLD_SIZE > 1).
+
+    Uses the gloo backend, so it works on CPU-only hosts, both for several
+    processes on one machine and across machines, e.g.
+
+        torchrun --nproc_per_node=4 train.py
+        torchrun --nnodes=2 --nproc_per_node=8 --rdzv_backend=c10d \\
+                 --rdzv_endpoint=host0:29500 train.py
+
+    Each process gets an equal share of the host's cores for intra-op
+    threads. Returns True when running distributed.
+    """
+    if int(os.environ.get("WORLD_SIZE", "1")) <= 1:
+        return False
+
+    dist.init_process_group(backend="gloo")
+    local_world_size = int(os.environ.get("LOCAL_WORLD_SIZE", "1"))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+    return True
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def rank():
+    return dist.get_rank() if is_distributed() else 0
+
+
+def world_size():
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process():
+    return rank() == 0
+
+
+def all_reduce_sum(*values):
+    """Sum Python numbers across ranks; returns them unchanged when not distributed."""
+    if not is_distributed():
+        return values
+    tensor = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tuple(tensor.tolist())
+
+
+def broadcast_object(obj):
+    """
+    Rank 0's `obj` on every rank (pickled and sent over the process group);
+    returned unchanged when not distributed.
+    """
+    if not is_distributed():
+        return obj
+    box = [obj if is_main_process() else None]
+    dist.broadcast_object_list(box, src=0)
+    return box[0]
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def cleanup_distributed():
+    if is_distributed():
+        dist.destroy_process_group()
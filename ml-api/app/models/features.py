@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+TEXT_FILE = "text_features.npy"
+IMAGE_FILE = "image_features.npy"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+
+class FeatureStore:
+    """
+    Frozen-backbone features for every dataset row:
+
+    - text_features.npy   N×D   text tower output (768 for BERT and DistilBERT, float32)
+    - image_features.npy  N×D   image tower output (2048 ResNet50, 512 ResNet18, float32)
+    - ids.json            dataset_samples.id for each row
+
+    Arrays are memory-mapped on load, so the head trainer only pages in
+    the rows it uses.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, IDS_FILE)) as f:
+            self.ids = json.load(f)
+        self.text = np.load(os.path.join(directory, TEXT_FILE), mmap_mode="r")
+        self.image = np.load(os.path.join(directory, IMAGE_FILE), mmap_mode="r")
+        self.index = {row_id: i for i, row_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def covers(self, row_ids, meta):
+        """True when every row id is present and the store was built the same way."""
+        return self.meta == meta and all(str(row_id) in self.index for row_id in row_ids)
+
+    def tensors(self, row_ids):
+        """Stack (text, image) features for `row_ids`, in that order."""
+        rows = [self.index[str(row_id)] for row_id in row_ids]
+        return (
+            torch.from_numpy(np.ascontiguousarray(self.text[rows])),
+            torch.from_numpy(np.ascontiguousarray(self.image[rows])),
+        )
+
+    @staticmethod
+    def extract(model, loader, directory, device, meta):
+        """Run both frozen towers once over `loader` and write the features."""
+        os.makedirs(directory, exist_ok=True)
+        model.eval()
+
+        ids, text_chunks, image_chunks = [], [], []
+        with torch.no_grad():
+            for batch in tqdm(loader, desc="Extracting features"):
+                text_out = model.encode_text(
+                    batch['input_ids'].to(device), batch['attention_mask'].to(device)
+                )
+                image_out = model.encode_image(batch['image'].to(device))
+
+                ids.extend(batch['id'])
+                text_chunks.append(text_out.float().cpu().numpy())
+                image_chunks.append(image_out.float().cpu().numpy())
+
+        np.save(os.path.join(directory, TEXT_FILE), np.concatenate(text_chunks))
+        np.save(os.path.join(directory, IMAGE_FILE), np.concatenate(image_chunks))
+        with open(os.path.join(directory, IDS_FILE), "w") as f:
+            json.dump([str(row_id) for row_id in ids], f)
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump(meta, f, indent=4)
+
+        return FeatureStore(directory)
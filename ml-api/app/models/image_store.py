@@ -0,0 +1,147 @@
+import json
+import os
+
+import numpy as np
+import torch
+from PIL import Image
+
+IMAGE_SIZE = 224
+IMAGE_SHAPE = (3, IMAGE_SIZE, IMAGE_SIZE)
+IMAGE_BYTES = 3 * IMAGE_SIZE * IMAGE_SIZE
+INDEX_FILE = "index.json"
+
+IMAGENET_MEAN = torch.tensor([0.485, 0.456, 0.406]).view(1, 3, 1, 1)
+IMAGENET_STD = torch.tensor([0.229, 0.224, 0.225]).view(1, 3, 1, 1)
+
+
+def normalize_images(images):
+    """uint8 N×3×224×224 batch -> float batch, same as ToTensor() + Normalize()."""
+    return (images.float().div_(255.0) - IMAGENET_MEAN) / IMAGENET_STD
+
+
+def decode_image(path):
+    """Decode one image file to a 3×224×224 uint8 array."""
+    image = Image.open(path).convert('RGB').resize((IMAGE_SIZE, IMAGE_SIZE), Image.BILINEAR)
+    return np.ascontiguousarray(np.asarray(image, dtype=np.uint8).transpose(2, 0, 1))
+
+
+class ImageShardStore:
+    """
+    Preprocessed training images packed into raw uint8 shards of shape
+    N×3×224×224 (`shard_00000.u8`, ...) plus `index.json`, which maps each
+    image id to [shard, slot]. Ids whose file could not be decoded are
+    recorded with slot -1 and retried by the next `update()`.
+
+    Shards are only ever appended to, so `update()` adds newly downloaded
+    images without rewriting existing ones. Images downloaded since the last
+    update are decoded from their JPEG by `get()` until then.
+    """
+
+    def __init__(self, directory, shard_size=1024):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.index = {}
+        self.shard_counts = []
+        self._maps = {}
+
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                data = json.load(f)
+            self.shard_size = data["shard_size"]
+            self.index = data["index"]
+            self.shard_counts = data["shard_counts"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, image_id):
+        return str(image_id) in self.index
+
+    def _shard_path(self, shard):
+        return os.path.join(self.directory, f"shard_{shard:05d}.u8")
+
+    def _shard(self, shard):
+        mapped = self._maps.get(shard)
+        if mapped is None or len(mapped) != self.shard_counts[shard]:
+            mapped = np.memmap(
+                self._shard_path(shard), dtype=np.uint8, mode="c",
+                shape=(self.shard_counts[shard],) + IMAGE_SHAPE,
+            )
+            self._maps[shard] = mapped
+        return mapped
+
+    def get(self, image_id, image_dir=None):
+        """
+        Returns (uint8 tensor, missing flag) for one image id: a view into
+        its shard, or, for ids not packed yet, `image_dir`/<id>.jpg decoded
+        the same way. `missing` only when neither has a usable image.
+        """
+        shard, slot = self.index.get(str(image_id), (-1, -1))
+        if slot >= 0:
+            return torch.from_numpy(self._shard(shard)[slot]), False
+        if image_dir is not None:
+            try:
+                return torch.from_numpy(decode_image(os.path.join(image_dir, f"{image_id}.jpg"))), False
+            except (OSError, ValueError):
+                pass
+        return torch.zeros(IMAGE_SHAPE, dtype=torch.uint8), True
+
+    def _save_index(self):
+        tmp_path = os.path.join(self.directory, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "shard_size": self.shard_size,
+                "shard_counts": self.shard_counts,
+                "index": self.index,
+            }, f)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def update(self, image_dir, checkpoint_every=1000):
+        """Append every image in `image_dir` that is not packed yet, retrying undecodable ones."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._maps.clear()
+
+        pending = sorted(
+            name for name in os.listdir(image_dir)
+            if self.index.get(os.path.splitext(name)[0], (-1, -1))[1] < 0
+        )
+        added = missing = 0
+
+        shard_file = None
+        try:
+            for n, name in enumerate(pending, 1):
+                image_id = os.path.splitext(name)[0]
+                try:
+                    pixels = decode_image(os.path.join(image_dir, name))
+                except (OSError, ValueError):
+                    self.index[image_id] = [-1, -1]
+                    missing += 1
+                    continue
+
+                if not self.shard_counts or self.shard_counts[-1] >= self.shard_size:
+                    if shard_file:
+                        shard_file.close()
+                    self.shard_counts.append(0)
+                    shard_file = None
+                if shard_file is None:
+                    shard = len(self.shard_counts) - 1
+                    shard_path = self._shard_path(shard)
+                    shard_file = open(shard_path, "ab")
+                    # Drop a torn tail left by an interrupted run.
+                    shard_file.truncate(self.shard_counts[shard] * IMAGE_BYTES)
+
+                shard_file.write(pixels.tobytes())
+                self.index[image_id] = [len(self.shard_counts) - 1, self.shard_counts[-1]]
+                self.shard_counts[-1] += 1
+                added += 1
+
+                if n % checkpoint_every == 0:
+                    shard_file.flush()
+                    self._save_index()
+        finally:
+            if shard_file:
+                shard_file.close()
+            self._save_index()
+
+        return added, missing
@@ -0,0 +1,42 @@
+import contextlib
+
+import torch
+
+# CPU flags with native bf16 matmul support: AVX512-BF16 / AMX on x86, the
+# BF16 extension on aarch64. Without them bf16 autocast still runs, but
+# through emulation that is slower than fp32.
+CPU_BF16_FLAGS = {"avx512_bf16", "amx_bf16", "bf16"}
+
+
+def cpu_supports_bf16():
+    """
+    True when the CPU advertises native bf16 instructions. Checked from the
+    CPU flags rather than oneDNN's own test, which also says yes on any
+    AVX512 CPU (e.g. Skylake / Cascade Lake) where bf16 is only emulated.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+    for line in cpuinfo.splitlines():
+        name, _, value = line.partition(":")
+        # "flags" on x86, "Features" on aarch64.
+        if name.strip() in ("flags", "Features") and CPU_BF16_FLAGS & set(value.split()):
+            return True
+    return False
+
+
+def bf16_supported(device):
+    if device.type == "cpu":
+        return cpu_supports_bf16()
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    return False
+
+
+def autocast(device, precision):
+    """bf16 autocast on `device` for precision "bf16", a no-op otherwise."""
+    if precision != "bf16":
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device.type, dtype=torch.bfloat16)
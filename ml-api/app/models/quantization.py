@@ -0,0 +1,78 @@
+import copy
+import os
+
+import torch
+import torch.nn as nn
+from PIL import Image
+
+
+def _select_engine():
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError("This torch build has no quantized CPU engine.")
+
+
+def load_calibration_images(image_dir, transform, limit=64, batch_size=16):
+    """Read up to `limit` images from `image_dir` as normalized batches."""
+    if not image_dir or not os.path.isdir(image_dir):
+        return []
+
+    tensors = []
+    for name in sorted(os.listdir(image_dir)):
+        if len(tensors) >= limit:
+            break
+        try:
+            image = Image.open(os.path.join(image_dir, name)).convert('RGB')
+        except OSError:
+            continue
+        tensors.append(transform(image))
+
+    return [
+        torch.stack(tensors[i:i + batch_size])
+        for i in range(0, len(tensors), batch_size)
+    ]
+
+
+def quantize_image_tower(resnet_features, calibration_batches):
+    """
+    Static int8 quantization of the ResNet trunk with FX graph mode.
+    Activation ranges are observed on `calibration_batches`.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    engine = _select_engine()
+    module = copy.deepcopy(resnet_features).eval()
+    prepared = prepare_fx(
+        module,
+        get_default_qconfig_mapping(engine),
+        example_inputs=(calibration_batches[0],),
+    )
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def quantize_model(model, calibration_batches=None):
+    """
+    Returns an int8 CPU copy of a FakeNewsClassifier:
+    - dynamic int8 for every nn.Linear (BERT encoder/pooler and the head);
+    - static int8 for the ResNet tower when calibration images are given,
+      otherwise the ResNet tower stays fp32.
+    """
+    _select_engine()
+    model = copy.deepcopy(model).cpu().eval()
+
+    if calibration_batches:
+        model.resnet_features = quantize_image_tower(model.resnet_features, calibration_batches)
+        print(f" ResNet tower quantized to int8 ({sum(len(b) for b in calibration_batches)} calibration images)")
+    else:
+        print(" No calibration images, ResNet tower stays fp32")
+
+    model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    print(" BERT and classifier Linear layers quantized to dynamic int8")
+    return model
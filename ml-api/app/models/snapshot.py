@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+# pyarrow is imported by the functions that need it, so importing the
+# dataset (and serving) does not require it.
+SNAPSHOT_COLUMNS = ["id", "text", "label", "image_url", "metadata"]
+TRAINING_COLUMNS = ["id", "text", "label"]
+
+
+def _snapshot_schema():
+    import pyarrow as pa
+    return pa.schema([(name, pa.string()) for name in SNAPSHOT_COLUMNS])
+
+
+def manifest_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def _hash_record(digest, record):
+    digest.update(json.dumps([record[name] for name in SNAPSHOT_COLUMNS]).encode("utf-8"))
+    digest.update(b"\n")
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _write_manifest(path, manifest):
+    tmp_path = manifest_path(path) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, manifest_path(path))
+
+
+def _to_record(row):
+    record = {}
+    for name in SNAPSHOT_COLUMNS:
+        value = row.get(name)
+        if name == "metadata" and value is not None and not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True)
+        record[name] = None if value is None else str(value)
+    return record
+
+
+def write_snapshot(rows, path, batch_size=10000):
+    """
+    Write `rows` (mappings with SNAPSHOT_COLUMNS) to a Parquet file and a
+    JSON manifest next to it.
+
+    The manifest's content_hash is a sha256 over the row values in the order
+    written, independent of Parquet encoding, so two exports of the same
+    table hash the same and any edit to the table changes it.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _snapshot_schema()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    digest = hashlib.sha256()
+    num_rows = 0
+
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = []
+
+        def flush():
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch.clear()
+
+        for row in rows:
+            record = _to_record(row)
+            _hash_record(digest, record)
+            batch.append(record)
+            num_rows += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    manifest = {
+        "content_hash": digest.hexdigest(),
+        "rows": num_rows,
+        "columns": SNAPSHOT_COLUMNS,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        # The hash was computed from exactly this file; readers only re-hash
+        # it when its size or mtime no longer match.
+        "verified_file": _file_stamp(path),
+    }
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def read_manifest(path):
+    with open(manifest_path(path)) as f:
+        return json.load(f)
+
+
+def verify_snapshot(path, batch_size=10000):
+    """
+    Recompute the snapshot's content_hash (and row count) from the Parquet
+    file and raise ValueError if it does not match its manifest. On success
+    the file's size and mtime are recorded in the manifest as verified.
+    """
+    import pyarrow.parquet as pq
+
+    manifest = read_manifest(path)
+    digest = hashlib.sha256()
+    num_rows = 0
+    for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size, columns=SNAPSHOT_COLUMNS):
+        for record in batch.to_pylist():
+            _hash_record(digest, record)
+            num_rows += 1
+
+    if digest.hexdigest() != manifest["content_hash"] or num_rows != manifest["rows"]:
+        raise ValueError(
+            f"{path} does not match its manifest ({num_rows} rows, hash {digest.hexdigest()[:12]}; "
+            f"manifest: {manifest['rows']} rows, hash {manifest['content_hash'][:12]})"
+        )
+    manifest["verified_file"] = _file_stamp(path)
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def ensure_verified(path):
+    """
+    verify_snapshot, but only when the file changed since it was last
+    verified (at export or by an earlier run): re-hashing every row is a
+    full pass over the table, too slow to pay on every training start.
+    """
+    manifest = read_manifest(path)
+    if manifest.get("verified_file") == _file_stamp(path):
+        return manifest
+    print(f" {path} changed since it was last verified, re-hashing it...")
+    return verify_snapshot(path)
+
+
+def load_snapshot_rows(path, columns=TRAINING_COLUMNS, verify=True):
+    """
+    Read only `columns` from a snapshot, memory-mapping the file, and return
+    them as a list of row dicts (the same shape `get_data_rows` returns).
+    With `verify`, a file that changed since its last verification is first
+    checked against its manifest's content_hash, so a model's recorded
+    dataset_hash really is its data.
+    """
+    import pyarrow.parquet as pq
+
+    if verify:
+        ensure_verified(path)
+    table = pq.read_table(path, columns=list(columns), memory_map=True)
+    return table.to_pylist()
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import random
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from torch.utils.data import IterableDataset, get_worker_info
+from transformers import BertTokenizerFast
+
+from app.models.dataset import TOKENIZER_NAME, load_image, make_item
+
+FIRST_PAGE_QUERY = text(
+    "SELECT id, text, label FROM dataset_samples WHERE id >= :first AND id <= :last ORDER BY id LIMIT :limit"
+)
+NEXT_PAGE_QUERY = text(
+    "SELECT id, text, label FROM dataset_samples WHERE id > :after AND id <= :last ORDER BY id LIMIT :limit"
+)
+
+
+def id_range(part, parts):
+    """
+    Inclusive (first, last) bounds of the `part`-th of `parts` equal slices
+    of the UUID space. Ids are random (uuid4), so the slices hold about the
+    same number of rows, and each is a plain range scan of the primary key.
+    """
+    span = 1 << 128
+    return uuid.UUID(int=part * span // parts), uuid.UUID(int=(part + 1) * span // parts - 1)
+
+
+def iter_dataset_rows(page_size=1000, bounds=None):
+    """
+    Yield every dataset_samples row (with an id within `bounds`, see
+    id_range; default all) in id order using keyset pagination, one page in
+    memory at a time.
+
+    Uses its own event loop and a pool-less engine so it can run inside
+    DataLoader worker processes, which must not share asyncpg connections
+    with the parent.
+    """
+    from app.core.db import database_url
+
+    first, last = bounds or id_range(0, 1)
+    loop = asyncio.new_event_loop()
+    engine = create_async_engine(database_url, poolclass=NullPool)
+
+    async def fetch_page(after):
+        async with engine.connect() as conn:
+            if after is None:
+                result = await conn.execute(FIRST_PAGE_QUERY, {"first": first, "last": last, "limit": page_size})
+            else:
+                result = await conn.execute(NEXT_PAGE_QUERY, {"after": after, "last": last, "limit": page_size})
+            return result.mappings().all()
+
+    try:
+        after = None
+        while True:
+            page = loop.run_until_complete(fetch_page(after))
+            if not page:
+                break
+            yield from page
+            after = page[-1]['id']
+            if len(page) < page_size:
+                break
+    finally:
+        loop.run_until_complete(engine.dispose())
+        loop.close()
+
+
+def split_of(row_id, val_fraction=0.2, seed=0):
+    """Deterministic train/val assignment from a hash of the row id."""
+    digest = hashlib.sha1(f"{seed}:{row_id}".encode("utf-8")).hexdigest()
+    return "val" if int(digest[:8], 16) / 0x100000000 < val_fraction else "train"
+
+
+class StreamingFakeNewsDataset(IterableDataset):
+    """
+    FakeNewsDataset over the full dataset_samples table without loading it.
+
+    Rows stream from Postgres page by page, are assigned to train/val by
+    `split_of` (so both splits see the same assignment without a shared
+    index) and, for training,
+    shuffled through a bounded buffer. Each page is tokenized in one batch.
+    Each DataLoader worker reads only its own slice of the id space, so an
+    epoch reads the table once per split, whatever the worker count.
+    """
+
+    def __init__(self, split, image_dir, transform=None, max_len=128, image_store=None,
+                 val_fraction=0.2, split_seed=0, shuffle_buffer=0, page_size=1000):
+        self.split = split
+        self.image_dir = image_dir
+        self.transform = transform
+        self.max_len = max_len
+        self.image_store = image_store
+        self.val_fraction = val_fraction
+        self.split_seed = split_seed
+        self.shuffle_buffer = shuffle_buffer
+        self.page_size = page_size
+        self.epoch = 0
+        self.tokenizer = None
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def reset_tokenizer(self):
+        self.tokenizer = None
+
+    def _rows(self):
+        worker = get_worker_info()
+        num_workers = worker.num_workers if worker else 1
+        worker_id = worker.id if worker else 0
+
+        for row in iter_dataset_rows(self.page_size, id_range(worker_id, num_workers)):
+            if split_of(row['id'], self.val_fraction, self.split_seed) == self.split:
+                yield row
+
+    def _shuffled(self, rows):
+        if not self.shuffle_buffer:
+            yield from rows
+            return
+
+        rng = random.Random(self.split_seed + self.epoch)
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= self.shuffle_buffer:
+                yield buffer.pop(rng.randrange(len(buffer)))
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _items(self, rows):
+        if self.tokenizer is None:
+            self.tokenizer = BertTokenizerFast.from_pretrained(TOKENIZER_NAME)
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.page_size:
+                yield from self._encode(chunk)
+                chunk = []
+        if chunk:
+            yield from self._encode(chunk)
+
+    def _encode(self, chunk):
+        encodings = self.tokenizer(
+            [row['text'] for row in chunk],
+            add_special_tokens=True,
+            max_length=self.max_len,
+            truncation=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        for row, token_ids in zip(chunk, encodings['input_ids']):
+            if self.image_store is not None:
+                image, image_missing = self.image_store.get(row['id'], self.image_dir)
+            else:
+                image, image_missing = load_image(self.image_dir, row['id'], self.transform), False
+            yield make_item(row, token_ids, image, image_missing)
+
+    def __iter__(self):
+        return self._items(self._shuffled(self._rows()))
@@ -0,0 +1,105 @@
+import json
+import os
+
+import numpy as np
+
+IDS_FILE = "ids.int32.bin"
+OFFSETS_FILE = "offsets.npy"
+ROW_IDS_FILE = "row_ids.json"
+META_FILE = "meta.json"
+
+
+class TokenStore:
+    """
+    Pre-tokenized `dataset_samples` text on disk:
+
+    - ids.int32.bin   all token ids back to back (int32, memory-mapped)
+    - offsets.npy     row i spans ids[offsets[i]:offsets[i + 1]]
+    - row_ids.json    dataset_samples.id for each row
+    - meta.json       tokenizer name and max_len used to build the store
+
+    `get()` returns a view into the memory map, so reading a row copies
+    nothing until the batch is padded.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, ROW_IDS_FILE)) as f:
+            row_ids = json.load(f)
+
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE))
+        ids_path = os.path.join(directory, IDS_FILE)
+        if os.path.getsize(ids_path):
+            # mode "c" gives writable (copy-on-write) views, which torch can
+            # wrap without warnings; the file itself is never modified.
+            self.ids = np.memmap(ids_path, dtype=np.int32, mode="c")
+        else:
+            self.ids = np.zeros(0, dtype=np.int32)
+        self.index = {row_id: i for i, row_id in enumerate(row_ids)}
+
+    @property
+    def max_len(self):
+        return self.meta["max_len"]
+
+    @property
+    def tokenizer_name(self):
+        return self.meta["tokenizer"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, row_id):
+        return str(row_id) in self.index
+
+    def get(self, row_id):
+        i = self.index[str(row_id)]
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @staticmethod
+    def build(rows, tokenizer, directory, tokenizer_name, max_len=128, chunk_size=4096):
+        """
+        Tokenize `rows` (an iterable of {'id', 'text'} mappings) in chunks with
+        the batch tokenizer and write a new store to `directory`.
+        """
+        os.makedirs(directory, exist_ok=True)
+        row_ids = []
+        offsets = [0]
+
+        def flush(chunk, ids_file):
+            encodings = tokenizer(
+                [row['text'] for row in chunk],
+                add_special_tokens=True,
+                max_length=max_len,
+                truncation=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )
+            for row, ids in zip(chunk, encodings['input_ids']):
+                np.asarray(ids, dtype=np.int32).tofile(ids_file)
+                row_ids.append(str(row['id']))
+                offsets.append(offsets[-1] + len(ids))
+
+        tmp_ids = os.path.join(directory, IDS_FILE + ".tmp")
+        with open(tmp_ids, "wb") as ids_file:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    flush(chunk, ids_file)
+                    chunk = []
+            if chunk:
+                flush(chunk, ids_file)
+
+        os.replace(tmp_ids, os.path.join(directory, IDS_FILE))
+        np.save(os.path.join(directory, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+        with open(os.path.join(directory, ROW_IDS_FILE), "w") as f:
+            json.dump(row_ids, f)
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({"tokenizer": tokenizer_name, "max_len": max_len, "rows": len(row_ids)}, f, indent=4)
+
+        return TokenStore(directory)
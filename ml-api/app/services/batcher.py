@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from app.core.executors import run_in_pool
+
+
+class InferenceBatcher:
+    """
+    Collects concurrent predict calls into micro-batches so the model runs
+    one forward pass for many requests instead of one per request.
+
+    A batch is cut when it holds `max_batch_size` requests or when the first
+    request in it has waited `max_wait_ms`, whichever comes first. Up to
+    `max_in_flight` batches run at once (more than one only pays off when
+    the predictor has several model workers); while all of them are busy,
+    new requests keep queueing into the next batch.
+    """
+
+    def __init__(self, predictor, max_batch_size=8, max_wait_ms=10.0, max_in_flight=1):
+        self.predictor = predictor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._queue = None
+        self._worker = None
+        self._slots = None
+        self._in_flight = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._worker = asyncio.create_task(self._run())
+        print(
+            f" Batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f}, max_in_flight={self.max_in_flight})"
+        )
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        while self._queue and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference batcher is shutting down."))
+
+    async def predict(self, text, image_bytes):
+        if self._worker is None:
+            raise RuntimeError("Inference batcher is not running.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, image_bytes, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            batch = await self._collect()
+            batch = [item for item in batch if not item[2].cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            texts = [text for text, _, _ in batch]
+            images = [image_bytes for _, image_bytes, _ in batch]
+            outcomes = await run_in_pool("inference", self._predict_batch, texts, images)
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference batcher is shutting down."))
+            raise
+        finally:
+            self._slots.release()
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def _predict_batch(self, texts, images):
+        try:
+            return self.predictor.predict_batch(texts, images)
+        except Exception as e:
+            if len(texts) == 1:
+                return [e]
+
+        # One bad input (e.g. an undecodable image) must not fail every
+        # caller in the batch, so fall back to scoring items one by one.
+        outcomes = []
+        for text, image_bytes in zip(texts, images):
+            try:
+                outcomes.append(self.predictor.predict(text, image_bytes))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
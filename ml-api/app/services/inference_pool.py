@@ -0,0 +1,313 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+from app.core import config
+
+
+def parse_cpu_list(spec):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus, workers):
+    """Deal `cpus` into `workers` contiguous, near-equal core sets."""
+    size, extra = divmod(len(cpus), workers)
+    sets, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        # More workers than cores: share cores round-robin rather than pin to none.
+        sets.append(cpus[start:end] or [cpus[i % len(cpus)]])
+        start = end
+    return sets
+
+
+def _worker_main(conn, slab_name, cpus, threads):
+    """
+    Model worker process: pin to `cpus`, cap torch at `threads` intra-op
+    threads, load the predictor, then serve predict_batch requests from
+    `conn`. Image bytes are read in place from the shared-memory slab.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from app.services.predictor import load_in_process_predictor
+
+    slab = shared_memory.SharedMemory(name=slab_name)
+    try:
+        try:
+            predictor = load_in_process_predictor()
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+            return
+        conn.send(("ready", (predictor.model_version, predictor.model_variant)))
+
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            texts, spans, inline_images = request
+            images = inline_images or [slab.buf[start:end] for start, end in spans]
+            try:
+                conn.send(("ok", predictor.predict_batch(texts, images)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+            finally:
+                # Views into the slab must be gone before it can be reused or closed.
+                del images
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        slab.close()
+
+
+class _Worker:
+    def __init__(self, context, index, cpus, threads, slab_bytes):
+        self.index = index
+        self.cpus = cpus
+        self.threads = threads
+        self.slab = shared_memory.SharedMemory(create=True, size=slab_bytes)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.slab.name, cpus, threads),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def _recv(self, timeout):
+        # poll() also returns on EOF, so a dead worker surfaces as EOFError.
+        if timeout and not self.conn.poll(timeout):
+            raise TimeoutError(f"Inference worker {self.index} did not answer within {timeout}s")
+        return self.conn.recv()
+
+    def wait_ready(self, timeout=None):
+        status, detail = self._recv(timeout)
+        if status != "ready":
+            raise RuntimeError(f"Inference worker {self.index} failed to load the model: {detail}")
+        return detail
+
+    def predict_batch(self, texts, images_bytes, timeout=None):
+        # One copy of each image into the worker's slab, no pickling of the
+        # payload; batches that do not fit are sent inline instead.
+        if sum(len(b) for b in images_bytes) <= self.slab.size:
+            spans, offset = [], 0
+            for image_bytes in images_bytes:
+                end = offset + len(image_bytes)
+                self.slab.buf[offset:end] = image_bytes
+                spans.append((offset, end))
+                offset = end
+            self.conn.send((list(texts), spans, None))
+        else:
+            self.conn.send((list(texts), None, list(images_bytes)))
+
+        status, detail = self._recv(timeout)
+        if status != "ok":
+            raise RuntimeError(detail)
+        return detail
+
+    def close(self, kill=False):
+        """Stop the worker; `kill` skips the graceful shutdown (hung or dead worker)."""
+        if not kill:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+        self.slab.close()
+        self.slab.unlink()
+
+
+class InferenceProcessPool:
+    """
+    Runs the model in `workers` separate processes, each pinned to its own
+    core set with its own torch thread budget, so inference threads do not
+    compete with uvicorn, tesseract and the scraper for the same cores.
+
+    Exposes the predictor interface the InferenceBatcher uses; `concurrency`
+    tells it how many batches to keep in flight (one per worker). Each call
+    borrows an idle worker, so it is safe to call from several threads.
+    The API process itself is pinned to the cores left over, if any.
+
+    A worker that dies or takes longer than `timeout` seconds on a batch
+    fails that batch right away and is replaced on a background thread,
+    retrying with backoff until a replacement starts; meanwhile the pool
+    runs degraded on the remaining workers (see `pool_stats`).
+    """
+
+    backend = "process-pool"
+    # Model loading (download, mmap, int8 calibration) can take a while.
+    startup_timeout = 300.0
+    # Delay before retrying a replacement that failed to start, doubling up
+    # to restart_backoff_max.
+    restart_backoff = 1.0
+    restart_backoff_max = 60.0
+
+    def __init__(self, workers, threads=0, cpus=None, slab_bytes=32 * 1024 * 1024, timeout=30.0):
+        self.concurrency = workers
+        self.timeout = timeout
+        self.slab_bytes = slab_bytes
+        self._closed = False
+        cpus = cpus or available_cpus()
+        core_sets = split_cpus(cpus, workers)
+
+        # spawn, not fork: the parent may already have torch/OpenMP threads.
+        context = multiprocessing.get_context("spawn")
+        self._workers = [
+            _Worker(context, i, core_set, threads or len(core_set), slab_bytes)
+            for i, core_set in enumerate(core_sets)
+        ]
+        try:
+            versions = {worker.wait_ready(self.startup_timeout) for worker in self._workers}
+        except Exception:
+            self.close()
+            raise
+        model_version, self.model_variant = versions.pop()
+        self.model_version = f"{model_version}:{self.backend}"
+
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        # Slots whose worker failed and is being replaced.
+        self._restarting = set()
+        self._restarts = 0
+        self._lock = threading.Lock()
+
+        leftover = sorted(set(available_cpus()) - set(cpus))
+        if leftover and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, leftover)
+        for worker in self._workers:
+            print(f" Inference worker {worker.index}: pid {worker.process.pid}, cpus {worker.cpus}")
+        if leftover:
+            print(f" API process pinned to cpus {leftover}")
+
+    def cache_stats(self):
+        # Tower caches live in the workers.
+        return None
+
+    def pool_stats(self):
+        with self._lock:
+            restarting = sorted(self._restarting)
+            restarts = self._restarts
+        return {
+            "workers": len(self._workers),
+            "healthy": len(self._workers) - len(restarting),
+            "restarting": restarting,
+            "restarts": restarts,
+            "degraded": bool(restarting),
+        }
+
+    def predict(self, text, image_bytes):
+        return self.predict_batch([text], [image_bytes])[0]
+
+    def _borrow(self):
+        while True:
+            with self._lock:
+                if len(self._restarting) == len(self._workers):
+                    # Waiting would mean waiting out a full model load.
+                    raise RuntimeError("No inference workers available, all of them are restarting.")
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+    def predict_batch(self, texts, images_bytes):
+        worker = self._borrow()
+        try:
+            result = worker.predict_batch(texts, images_bytes, timeout=self.timeout)
+        except (EOFError, OSError, TimeoutError) as e:
+            self._restart(worker, e)
+            raise RuntimeError(f"Inference worker {worker.index} failed ({e}).")
+        except BaseException:
+            # The worker answered with an error; it is still healthy.
+            self._idle.put(worker)
+            raise
+        self._idle.put(worker)
+        return result
+
+    def _restart(self, worker, reason):
+        """Take a dead or hung worker out of service and replace it in the background."""
+        print(f" Inference worker {worker.index} failed ({reason}), restarting it...")
+        with self._lock:
+            self._restarting.add(worker.index)
+            self._restarts += 1
+        threading.Thread(
+            target=self._replace, args=(worker,), name=f"inference-restart-{worker.index}", daemon=True
+        ).start()
+
+    def _replace(self, worker):
+        worker.close(kill=True)
+        context = multiprocessing.get_context("spawn")
+        delay = self.restart_backoff
+        while not self._closed:
+            replacement = None
+            try:
+                replacement = _Worker(context, worker.index, worker.cpus, worker.threads, self.slab_bytes)
+                replacement.wait_ready(self.startup_timeout)
+            except Exception as e:
+                print(f" Inference worker {worker.index} could not be restarted ({e}), retrying in {delay:.0f}s.")
+                if replacement is not None:
+                    replacement.close(kill=True)
+                time.sleep(delay)
+                delay = min(delay * 2, self.restart_backoff_max)
+                continue
+
+            with self._lock:
+                if self._closed:
+                    replacement.close()
+                    return
+                self._workers[worker.index] = replacement
+                self._restarting.discard(worker.index)
+            self._idle.put(replacement)
+            print(f" Inference worker {worker.index} restarted: pid {replacement.process.pid}")
+            return
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            restarting = set(self._restarting)
+        for worker in self._workers:
+            # A failed worker is closed by its restart thread.
+            if worker.index not in restarting:
+                worker.close()
+
+
+def load_process_pool():
+    cpus = parse_cpu_list(config.INFERENCE_CPUS) if config.INFERENCE_CPUS else None
+    return InferenceProcessPool(
+        config.INFERENCE_PROCESSES,
+        threads=config.INFERENCE_THREADS,
+        cpus=cpus,
+        slab_bytes=config.INFERENCE_SLAB_BYTES,
+        timeout=config.INFERENCE_TIMEOUT_SECONDS,
+    )
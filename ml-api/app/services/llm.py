@@ -1,14 +1,26 @@
+import asyncio
 import os
-from groq import Groq
+from groq import AsyncGroq
 
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+from app.core import config
+from app.core.lru import LRUCache
+from app.services.prediction_cache import normalize_text
 
-def generate_summary(text: str, label: str, confidence: float):
-    try:
-        if len(text) < 50:
-            return "Text too short for detailed analysis."
+async_client = AsyncGroq(
+    api_key=os.environ.get("GROQ_API_KEY"),
+    base_url=config.GROQ_BASE_URL,
+    timeout=config.LLM_TIMEOUT_SECONDS,
+    max_retries=config.LLM_MAX_RETRIES,
+)
+
+SHORT_TEXT_SUMMARY = "Text too short for detailed analysis."
+FALLBACK_SUMMARY = "Analysis unavailable at the moment."
+
+SYSTEM_PROMPT = "You are a helpful and concise fact-checking assistant."
 
-        prompt = f"""
+
+def _build_prompt(text: str, label: str, confidence: float):
+    return f"""
         You are an AI Fact Checker. 
         Analyze this news snippet: "{text[:1000]}"
         
@@ -20,18 +32,81 @@ def generate_summary(text: str, label: str, confidence: float):
         - Do NOT mention "I am an AI". Just give the analysis.
         """
 
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a helpful and concise fact-checking assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            model="llama-3.3-70b-versatile", 
-            temperature=0.5,
-            max_tokens=100,
-        )
 
+def _completion_args(text: str, label: str, confidence: float):
+    return dict(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _build_prompt(text, label, confidence)},
+        ],
+        model="llama-3.3-70b-versatile", 
+        temperature=0.5,
+        max_tokens=100,
+    )
+
+
+class SummaryService:
+    """
+    Async front for the Groq summaries.
+
+    - every call is bounded by `timeout` seconds;
+    - results are cached by (text prefix, label, confidence bucket), since
+      the prompt only depends on those;
+    - concurrent identical prompts share one in-flight request.
+
+    Failures return FALLBACK_SUMMARY and are not cached.
+    """
+
+    def __init__(self, llm_client=None, timeout=None, cache_size=1024,
+                 prefix_chars=1000, confidence_bucket=5.0):
+        self.client = llm_client or async_client
+        self.timeout = timeout if timeout is not None else config.LLM_TIMEOUT_SECONDS
+        self.prefix_chars = prefix_chars
+        self.confidence_bucket = confidence_bucket
+        self.cache = LRUCache(max_entries=cache_size)
+        self._in_flight = {}
+
+    def _key(self, text, label, confidence):
+        bucket = int(confidence // self.confidence_bucket)
+        return normalize_text(text[:self.prefix_chars]), label, bucket
+
+    async def _call(self, text, label, confidence):
+        chat_completion = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                **_completion_args(text, label, confidence)
+            ),
+            timeout=self.timeout,
+        )
         return chat_completion.choices[0].message.content.strip()
 
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        return "Analysis unavailable at the moment."
\ No newline at end of file
+    async def summarize(self, text: str, label: str, confidence: float):
+        if len(text) < 50:
+            return SHORT_TEXT_SUMMARY
+
+        key = self._key(text, label, confidence)
+        summary = self.cache.get(key)
+        if summary is not None:
+            return summary
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(text, label, confidence))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        try:
+            # shield() so one caller disconnecting does not cancel the
+            # request the other waiters are sharing.
+            summary = await asyncio.shield(task)
+        except Exception as e:
+            print(f"LLM Error: {type(e).__name__} {e}")
+            return FALLBACK_SUMMARY
+
+        self.cache.put(key, summary)
+        return summary
+
+
+summary_service = SummaryService(
+    cache_size=config.LLM_CACHE_SIZE,
+    timeout=config.LLM_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,45 @@
+import torch
+import onnxruntime as ort
+
+from app.core import config
+from app.services.predictor import FakeNewsPredictor
+
+
+class OnnxFakeNewsPredictor(FakeNewsPredictor):
+    """
+    FakeNewsPredictor that runs the exported graph (scripts/export_onnx.py)
+    on ONNX Runtime's CPU execution provider. Tokenization, image transforms
+    and post-processing are shared with the PyTorch predictor.
+    """
+
+    backend = "onnx"
+    # The exported graph is a single BERT + ResNet + head graph.
+    supports_tower_cache = False
+
+    def __init__(self, model_path="model.onnx", precision="fp32"):
+        if precision != "fp32":
+            raise ValueError("The ONNX backend serves the fp32 graph only.")
+        super().__init__(model_path=model_path, precision=precision)
+
+    def _select_device(self):
+        return torch.device("cpu")
+
+    def _load_model(self, model_path):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if config.ONNX_INTRA_OP_THREADS > 0:
+            options.intra_op_num_threads = config.ONNX_INTRA_OP_THREADS
+
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _forward(self, input_ids, attention_mask, images):
+        feeds = {
+            "input_ids": input_ids.numpy(),
+            "attention_mask": attention_mask.numpy(),
+            "images": images.numpy(),
+        }
+        logits = self.session.run(["logits"], {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        return torch.from_numpy(logits)
@@ -0,0 +1,52 @@
+import hashlib
+import unicodedata
+
+from app.core.lru import LRUCache
+
+
+def normalize_text(text):
+    # The tokenizer is uncased and ignores runs of whitespace, so these
+    # variants produce identical model inputs.
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split()).lower()
+
+
+def prediction_key(text, image_bytes):
+    digest = hashlib.sha256()
+    digest.update(normalize_text(text).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of predictor results keyed by
+    sha256(normalized text + image bytes).
+
+    Entries are tied to the predictor's `model_version`; when a predictor with
+    different weights is seen, the cache is cleared.
+    """
+
+    def __init__(self, max_entries=4096):
+        self._lru = LRUCache(max_entries=max_entries)
+        self.model_version = None
+
+    def _check_version(self, model_version):
+        if model_version != self.model_version:
+            if self.model_version is not None:
+                print(" Model weights changed, clearing prediction cache.")
+            self._lru.clear()
+            self.model_version = model_version
+
+    def get(self, model_version, key):
+        self._check_version(model_version)
+        result = self._lru.get(key)
+        return dict(result) if result is not None else None
+
+    def put(self, model_version, key, result):
+        self._check_version(model_version)
+        self._lru.put(key, dict(result))
+
+    def stats(self):
+        return dict(self._lru.stats(), model_version=self.model_version)
@@ -1,68 +1,247 @@
+import hashlib
+import os
 import torch
 import torch.nn.functional as F
 from torchvision import transforms
 from PIL import Image
 import io
 
-from app.models.classifier import FakeNewsClassifier
-from transformers import BertTokenizer
+from app.core import config
+from app.core.lru import LRUCache
+from app.models.batching import default_buckets, group_by_bucket, pad_sequences
+from app.models.artifact import is_artifact, load_artifact, load_checkpoint_weights
+from app.models.backbones import TOKENIZER_NAME
+from app.models.precision import autocast, bf16_supported
+from transformers import BertTokenizerFast
+
+PRECISIONS = ("fp32", "bf16", "int8")
 
 class FakeNewsPredictor:
-    def __init__(self, model_path="best_model.pth"):
+    backend = "torch"
+    # Batches the InferenceBatcher may run at once; a single in-process
+    # model already uses every intra-op thread on its own.
+    concurrency = 1
+    # Whether the model exposes encode_text/encode_image/classify, so each
+    # tower can be run (and its output cached) on its own.
+    supports_tower_cache = True
+    # MODEL_VARIANTS name of the loaded towers ("full", "small"), None if unknown.
+    model_variant = None
+
+    def __init__(self, model_path="best_model.pth", precision=None, max_seq_len=None):
         print(f" Loading Model from {model_path}...")
-        
-        if torch.backends.mps.is_available():
-            self.device = torch.device("mps")
-        elif torch.cuda.is_available():
-            self.device = torch.device("cuda")
-        else:
-            self.device = torch.device("cpu")
 
-        self.model = FakeNewsClassifier()
-        
-        state_dict = torch.load(model_path, map_location=self.device)
-        self.model.load_state_dict(state_dict)
-        
-        self.model.to(self.device)
-        self.model.eval()
-        
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+        self.max_seq_len = max_seq_len or config.MAX_SEQ_LEN
+        self.seq_buckets = default_buckets(self.max_seq_len)
+
+        self.precision = precision or config.MODEL_PRECISION
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{self.precision}', expected one of {PRECISIONS}")
+
+        self.device = self._select_device()
+        if self.precision == "bf16" and not bf16_supported(self.device):
+            print(" This CPU has no native bf16 support, serving fp32 instead")
+            self.precision = "fp32"
+        self.model_version = f"{self._fingerprint(model_path)}:{self.backend}:{self.precision}"
+
+        self.tokenizer = None
         self.transform = transforms.Compose([
             transforms.Resize((224, 224)),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
         ])
-        print(" Predictor Ready!")
 
-    def predict(self, text, image_bytes):
+        self._load_model(model_path)
+        if self.tokenizer is None:
+            self.tokenizer = BertTokenizerFast.from_pretrained(TOKENIZER_NAME)
+
+        self.text_cache = None
+        self.image_cache = None
+        if self.supports_tower_cache and config.EMBEDDING_CACHE_SIZE > 0:
+            self.text_cache = LRUCache(max_entries=config.EMBEDDING_CACHE_SIZE)
+            self.image_cache = LRUCache(max_entries=config.EMBEDDING_CACHE_SIZE)
+
+        print(f" Predictor Ready! (backend={self.backend}, precision={self.precision}, variant={self.model_variant})")
+
+    def _select_device(self):
+        if self.precision in ("bf16", "int8"):
+            # Quantized kernels only exist for CPU; bf16 is the CPU
+            # mixed-precision mode.
+            return torch.device("cpu")
+        elif torch.backends.mps.is_available():
+            return torch.device("mps")
+        elif torch.cuda.is_available():
+            return torch.device("cuda")
+        return torch.device("cpu")
+
+    def _load_model(self, model_path):
+        # Both formats build the architecture without pretrained weights and
+        # read the trained ones once; the artifact also carries the tokenizer.
+        if is_artifact(model_path):
+            self.model, self.tokenizer = load_artifact(model_path)
+        else:
+            self.model = load_checkpoint_weights(model_path)
+        self.model_variant = self.model.variant or "custom"
+
+        self.model.to(self.device)
+        self.model.eval()
+
+        if self.precision == "int8":
+            from app.models.quantization import load_calibration_images, quantize_model
+
+            calibration = load_calibration_images(
+                config.QUANTIZE_CALIBRATION_DIR,
+                self.transform,
+                limit=config.QUANTIZE_CALIBRATION_IMAGES,
+            )
+            self.model = quantize_model(self.model, calibration)
+
+    @staticmethod
+    def _fingerprint(model_path):
+        """Cheap identity of the weight file, used to invalidate result caches."""
+        stat = os.stat(model_path)
+        return f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def cache_stats(self):
+        if self.text_cache is None:
+            return None
+        return {"text": self.text_cache.stats(), "image": self.image_cache.stats()}
+
+    def _load_image(self, image_bytes):
         image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        image_tensor = self.transform(image).unsqueeze(0).to(self.device) 
+        return self.transform(image)
+
+    def _forward(self, input_ids, attention_mask, images):
+        return self.model(input_ids, attention_mask, images)
 
-        encoding = self.tokenizer.encode_plus(
-            text,
+    def predict(self, text, image_bytes):
+        return self.predict_batch([text], [image_bytes])[0]
+
+    def _tokenize(self, texts):
+        """Token ids per text, truncated to max_seq_len but not padded."""
+        encoding = self.tokenizer.batch_encode_plus(
+            list(texts),
             add_special_tokens=True,
-            max_length=128,
+            max_length=self.max_seq_len,
             return_token_type_ids=False,
-            padding='max_length',
             truncation=True,
-            return_attention_mask=True,
-            return_tensors='pt',
+            return_attention_mask=False,
         )
-        
-        input_ids = encoding['input_ids'].to(self.device)
-        attention_mask = encoding['attention_mask'].to(self.device)
-
-        with torch.no_grad():
-            logits = self.model(input_ids, attention_mask, image_tensor)
-            probabilities = F.softmax(logits, dim=1)
-            
-            fake_prob = probabilities[0][1].item()
-            
+        return encoding['input_ids']
+
+    def _load_images(self, images_bytes):
+        return torch.stack(
+            [self._load_image(image_bytes) for image_bytes in images_bytes]
+        ).to(self.device)
+
+    def _image_features(self, images_bytes):
+        """
+        ResNet features for every image, run once for the whole micro-batch.
+        With the tower cache, only the (deduplicated) misses are decoded and
+        run.
+        """
+        if self.image_cache is None:
+            return self.model.encode_image(self._load_images(images_bytes))
+
+        keys = [hashlib.sha256(image_bytes).hexdigest() for image_bytes in images_bytes]
+        feats = {key: self.image_cache.get(key) for key in keys}
+
+        misses = {key: i for i, key in enumerate(keys) if feats[key] is None}
+        if misses:
+            images = self._load_images([images_bytes[i] for i in misses.values()])
+            encoded = self.model.encode_image(images)
+            for key, feat in zip(misses, encoded):
+                feats[key] = feat.clone()
+                self.image_cache.put(key, feats[key])
+        return torch.stack([feats[key] for key in keys])
+
+    def _text_features(self, sequences):
+        """BERT features for one length bucket, padded to its longest sequence."""
+        input_ids, attention_mask = pad_sequences(sequences, self.tokenizer.pad_token_id)
+        input_ids = input_ids.to(self.device)
+        attention_mask = attention_mask.to(self.device)
+        if self.text_cache is None:
+            return self.model.encode_text(input_ids, attention_mask)
+
+        keys = [
+            hashlib.sha256(ids[mask.bool()].cpu().numpy().tobytes()).hexdigest()
+            for ids, mask in zip(input_ids, attention_mask)
+        ]
+        feats = {key: self.text_cache.get(key) for key in keys}
+
+        misses = {key: i for i, key in enumerate(keys) if feats[key] is None}
+        if misses:
+            rows = list(misses.values())
+            encoded = self.model.encode_text(input_ids[rows], attention_mask[rows])
+            for key, feat in zip(misses, encoded):
+                feats[key] = feat.clone()
+                self.text_cache.put(key, feats[key])
+        return torch.stack([feats[key] for key in keys])
+
+    def _logits(self, sequences, images_bytes):
+        """
+        Logits for the whole micro-batch. The image tower does not care about
+        sequence length, so it runs once over every image; only the text
+        tower is run per length bucket. Backends that cannot run the towers
+        separately (one exported graph) run a single pass padded to the
+        longest sequence instead, so the image tower still runs once.
+        """
+        if not self.supports_tower_cache:
+            input_ids, attention_mask = pad_sequences(sequences, self.tokenizer.pad_token_id)
+            return self._forward(
+                input_ids.to(self.device), attention_mask.to(self.device), self._load_images(images_bytes)
+            )
+
+        image_out = self._image_features(images_bytes)
+        logits = None
+        for rows in group_by_bucket([len(seq) for seq in sequences], self.seq_buckets):
+            bucket_logits = self.model.classify(
+                self._text_features([sequences[i] for i in rows]), image_out[rows]
+            )
+            if logits is None:
+                logits = bucket_logits.new_empty((len(sequences), bucket_logits.size(1)))
+            logits[rows] = bucket_logits
+        return logits
+
+    def predict_batch(self, texts, images_bytes):
+        """
+        Score a list of (text, image) pairs. BERT runs per length bucket,
+        each bucket padded only to its own longest sequence, so short
+        headlines do not pay for a full max_seq_len pass; ResNet runs once.
+        """
+        sequences = self._tokenize(texts)
+        with torch.no_grad(), autocast(self.device, self.precision):
+            logits = self._logits(sequences, images_bytes)
+        probabilities = F.softmax(logits.float(), dim=1).cpu()
+
+        results = []
+        for fake_prob in probabilities[:, 1].tolist():
             label = "Fake" if fake_prob > 0.5 else "Real"
             confidence = fake_prob if label == "Fake" else 1 - fake_prob
-            
-            return {
+
+            results.append({
                 "label": label,
                 "confidence": round(confidence * 100, 2),
                 "fake_probability": fake_prob
-            }
\ No newline at end of file
+            })
+        return results
+
+
+def load_predictor():
+    """
+    Build the predictor: in this process, or, with INFERENCE_PROCESSES > 0,
+    as a pool of pinned model worker processes.
+    """
+    if config.INFERENCE_PROCESSES > 0:
+        from app.services.inference_pool import load_process_pool
+        return load_process_pool()
+    return load_in_process_predictor()
+
+
+def load_in_process_predictor():
+    """Build the predictor for the configured INFERENCE_BACKEND."""
+    if config.INFERENCE_BACKEND == "onnx":
+        from app.services.onnx_predictor import OnnxFakeNewsPredictor
+        return OnnxFakeNewsPredictor(model_path=config.ONNX_MODEL_PATH)
+    if config.INFERENCE_BACKEND != "torch":
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{config.INFERENCE_BACKEND}'")
+    return FakeNewsPredictor(model_path=config.MODEL_PATH)
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from app.core import config
+from app.core.executors import run_in_pool
+from app.core.lru import LRUCache
+from app.services.scraper import fetch, scrape_page
+
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# The article is gone: its cached copy must not be served again.
+GONE_STATUSES = {404, 410}
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so trivially different submissions of the same article
+    share one cache entry: lowercase scheme/host, no default port, no
+    fragment, no tracking parameters and a sorted query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class DiskCache:
+    """
+    One JSON metadata file plus one raw image file per entry. An in-memory
+    index of entry sizes in least-recently-used order (rebuilt from the
+    directory on startup, ordered by mtime, which reads touch) lets eviction
+    drop whole entries once the directory grows past `max_bytes` without
+    rescanning it. Entries fetched more than `max_age` seconds ago are
+    dropped when read. Safe to use from several threads.
+    """
+
+    def __init__(self, directory, max_bytes, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total = 0
+        self._scan()
+
+    def _scan(self):
+        found = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            stem, ext = os.path.splitext(name)
+            try:
+                if ext == ".tmp":
+                    # Left behind by a save that never finished.
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            mtime, size = found.get(stem, (0.0, 0))
+            found[stem] = (max(mtime, stat.st_mtime), size + stat.st_size)
+
+        for stem, (_, size) in sorted(found.items(), key=lambda item: item[1][0]):
+            self._entries[stem] = size
+            self._total += size
+
+    def _name(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return f"{base}.json", f"{base}.img"
+
+    def load(self, key):
+        name = self._name(key)
+        meta_path, image_path = self._paths(name)
+        try:
+            with open(meta_path, "r") as f:
+                entry = json.load(f)
+            with open(image_path, "rb") as f:
+                entry["image"] = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+        now = time.time()
+        if self.max_age is not None and now - entry.get("fetched_at", 0) > self.max_age:
+            self.delete(key)
+            return None
+        try:
+            os.utime(meta_path, (now, now))
+            os.utime(image_path, (now, now))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+        return entry
+
+    def _write(self, path, data, mode):
+        # A unique temp file per save, so concurrent saves of the same key
+        # never write through each other; the last os.replace wins whole.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+
+    def save(self, key, entry):
+        name = self._name(key)
+        meta_path, image_path = self._paths(name)
+        meta = {k: v for k, v in entry.items() if k != "image"}
+
+        size = self._write(image_path, entry["image"], "wb")
+        size += self._write(meta_path, json.dumps(meta), "w")
+
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            victims = []
+            while self._total > self.max_bytes and self._entries:
+                victim, victim_size = self._entries.popitem(last=False)
+                self._total -= victim_size
+                victims.append(victim)
+
+        for victim in victims:
+            self._remove(victim)
+
+    def delete(self, key):
+        name = self._name(key)
+        with self._lock:
+            self._total -= self._entries.pop(name, 0)
+        self._remove(name)
+
+    def _remove(self, name):
+        # Metadata first, so a concurrent load misses instead of finding
+        # metadata without its image.
+        for path in self._paths(name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class ScrapeCache:
+    """
+    Two-tier cache of scraped articles keyed by canonical URL.
+
+    Fresh entries (younger than `ttl`) are served without touching the
+    network. Stale entries are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs one 304 round-trip.
+
+    When revalidation fails on a network error, a timeout or a 5xx, a stale
+    copy younger than `max_stale` is served instead. A 404/410 drops the
+    entry; any other failure serves nothing. Entries older than `max_stale`
+    are never served and are dropped from disk when next read.
+    """
+
+    def __init__(self, directory, ttl, memory_entries, memory_bytes, disk_bytes, max_stale):
+        self.ttl = ttl
+        self.max_stale = max(ttl, max_stale)
+        self.memory = LRUCache(
+            max_entries=memory_entries,
+            max_bytes=memory_bytes,
+            sizeof=lambda entry: len(entry["image"]) + len(entry["text"] or ""),
+        )
+        self.disk = DiskCache(directory, disk_bytes, max_age=self.max_stale)
+
+    async def _lookup(self, key):
+        entry = self.memory.get(key)
+        if entry is not None and time.time() - entry["fetched_at"] > self.max_stale:
+            self.memory.pop(key)
+            entry = None
+        if entry is None:
+            entry = await run_in_pool("scrape", self.disk.load, key)
+            if entry is not None:
+                self.memory.put(key, entry)
+        return entry
+
+    async def _drop(self, key):
+        self.memory.pop(key)
+        try:
+            await run_in_pool("scrape", self.disk.delete, key)
+        except OSError as e:
+            print(f" Scrape cache delete failed: {e}")
+
+    @staticmethod
+    def _can_serve_stale(error):
+        """Only transient failures: the origin may still have the article."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+    async def _store(self, key, entry):
+        self.memory.put(key, entry)
+        try:
+            await run_in_pool("scrape", self.disk.save, key, entry)
+        except OSError as e:
+            print(f" Scrape cache write failed: {e}")
+
+    @staticmethod
+    def _validators(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def _scrape(self, url, key, entry):
+        headers = self._validators(entry) if entry else None
+        response = await fetch(url, extra_headers=headers)
+
+        if response.status_code == 304 and entry:
+            entry = dict(entry, fetched_at=time.time())
+            await self._store(key, entry)
+            return entry["headline"], entry["text"], entry["image"]
+
+        response.raise_for_status()
+        headline, main_text, image_bytes = await scrape_page(url, response.content)
+
+        if headline and main_text and image_bytes:
+            await self._store(key, {
+                "url": key,
+                "headline": headline,
+                "text": main_text,
+                "image": image_bytes,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "fetched_at": time.time(),
+            })
+        return headline, main_text, image_bytes
+
+    async def scrape_article(self, url):
+        key = canonicalize_url(url)
+        entry = await self._lookup(key)
+
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            print(f"Scrape cache hit: {key}")
+            return entry["headline"], entry["text"], entry["image"]
+
+        try:
+            return await asyncio.wait_for(
+                self._scrape(url, key, entry), timeout=config.SCRAPE_TOTAL_TIMEOUT
+            )
+        except Exception as e:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code in GONE_STATUSES:
+                if entry:
+                    print(f" {key} is gone ({e.response.status_code}), dropping its cached copy")
+                    await self._drop(key)
+            elif entry and self._can_serve_stale(e):
+                print(f" Revalidation failed ({e!r}), serving stale copy of {key}")
+                return entry["headline"], entry["text"], entry["image"]
+            print(f" Critical Scraper Error: {e!r}")
+            return None, None, None
+
+    def stats(self):
+        return self.memory.stats()
@@ -1,121 +1,245 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import asyncio
+import html
+import json
+import re
+from urllib.parse import urljoin, urlsplit
+
+import httpx
 import trafilatura
+from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 
+from app.core import config
+from app.core.executors import run_in_pool
 
-def scrape_article(url: str):
-    print(f"Sophisticated Scraper Target: {url}")
+_user_agent = UserAgent()
+_client = None
+_host_semaphores = {}
+
+# og:image / twitter:image usually sit in <head>, so a cheap regex over the
+# first bytes of the page is enough to start the image download before the
+# full trafilatura/BeautifulSoup pass has finished.
+_META_IMAGE_RE = re.compile(
+    r"""<meta[^>]+(?:property|name)\s*=\s*["'](?:og:image|twitter:image)["'][^>]*>""",
+    re.IGNORECASE,
+)
+_CONTENT_RE = re.compile(r"""content\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_HEAD_SCAN_BYTES = 65536
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client():
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            follow_redirects=True,
+            timeout=httpx.Timeout(
+                config.SCRAPE_READ_TIMEOUT, connect=config.SCRAPE_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=config.SCRAPE_MAX_CONNECTIONS,
+                max_keepalive_connections=config.SCRAPE_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
-    ua = UserAgent()
-    headers = {
-        "User-Agent": ua.random,
+
+def _browser_headers():
+    return {
+        "User-Agent": _user_agent.random,
         "Accept-Language": "en-US,en;q=0.9",
         "Referer": "https://www.google.com/",
     }
 
-    try:
-        downloaded = trafilatura.fetch_url(url)
-
-        if not downloaded:
-            print(" Trafilatura fetch failed, switching to requests...")
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            downloaded = response.text
-
-        metadata = trafilatura.extract(
-            downloaded,
-            include_comments=False,
-            include_tables=False,
-            no_fallback=False,
-            output_format="json",
-            with_metadata=True,
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc.lower()
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(config.SCRAPE_PER_HOST_LIMIT)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+
+async def fetch(url, extra_headers=None):
+    """GET a URL on the shared client, respecting the per-host limit."""
+    headers = _browser_headers()
+    if extra_headers:
+        headers.update(extra_headers)
+
+    async with _host_semaphore(url):
+        return await get_client().get(url, headers=headers)
+
+
+def _find_meta_image(content):
+    head = content[:_HEAD_SCAN_BYTES].decode("utf-8", errors="ignore")
+    for tag in _META_IMAGE_RE.findall(head):
+        match = _CONTENT_RE.search(tag)
+        if match:
+            # Raw attribute text: undo entities (&amp; in query strings) as
+            # BeautifulSoup would.
+            return html.unescape(match.group(1))
+    return None
+
+
+def _extract(content):
+    """CPU-bound part of the scrape: returns (headline, main_text, image_url)."""
+    metadata = trafilatura.extract(
+        content,
+        include_comments=False,
+        include_tables=False,
+        no_fallback=False,
+        output_format="json",
+        with_metadata=True,
+    )
+
+    headline = None
+    main_text = None
+
+    if metadata:
+        data = json.loads(metadata)
+        headline = data.get("title")
+        main_text = data.get("text")
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    if not headline:
+        print("Metadata missing title, scraping manually...")
+        og_title = soup.find("meta", property="og:title")
+        headline = (
+            og_title["content"]
+            if og_title
+            else (soup.title.string if soup.title else None)
         )
-        import json
-
-        headline = None
-        main_text = None
-
-        if metadata:
-            data = json.loads(metadata)
-            headline = data.get("title")
-            main_text = data.get("text")
-
-        soup = BeautifulSoup(downloaded, "html.parser")
-
-        if not headline:
-            print("Metadata missing title, scraping manually...")
-            og_title = soup.find("meta", property="og:title")
-            headline = (
-                og_title["content"]
-                if og_title
-                else (soup.title.string if soup.title else None)
-            )
-
-        if not main_text or len(main_text) < 100:
-            print("Metadata missing text, scraping manually...")
-            body_content = (
-                soup.find("div", {"id": "bodyContent"})
-                or soup.find("article")
-                or soup.find("main")
-                or soup.body
-            )
-            if body_content:
-                paragraphs = body_content.find_all("p")
-                valid_paras = [
-                    p.get_text() for p in paragraphs if len(p.get_text().split()) > 5
-                ]
-                main_text = "\n".join(valid_paras)
-
-        image_url = None
-
-        og_image = soup.find("meta", property="og:image")
-        if og_image and og_image.get("content"):
-            image_url = og_image["content"]
-
-        if not image_url:
-            twitter_img = soup.find("meta", attrs={"name": "twitter:image"})
-            if twitter_img:
-                image_url = twitter_img.get("content")
-
-        if not image_url:
-            target_container = soup.find("article") or soup.find("main") or soup
-            images = target_container.find_all("img")
-
-            for img in images:
-                src = img.get("src")
-                if not src:
-                    continue
-
-                if any(
-                    x in src.lower()
-                    for x in [".svg", "logo", "icon", "avatar", "spacer"]
-                ):
-                    continue
-
-                width = img.get("width")
-                if width and width.isdigit() and int(width) < 200:
-                    continue
-
-                image_url = src
-                break
-
-        if not headline or not image_url:
-            print(" Failed to find critical content.")
-            return None, None
 
-        if not image_url.startswith("http"):
-            image_url = urljoin(url, image_url)
+    if not main_text or len(main_text) < 100:
+        print("Metadata missing text, scraping manually...")
+        body_content = (
+            soup.find("div", {"id": "bodyContent"})
+            or soup.find("article")
+            or soup.find("main")
+            or soup.body
+        )
+        if body_content:
+            paragraphs = body_content.find_all("p")
+            valid_paras = [
+                p.get_text() for p in paragraphs if len(p.get_text().split()) > 5
+            ]
+            main_text = "\n".join(valid_paras)
+
+    image_url = None
+
+    og_image = soup.find("meta", property="og:image")
+    if og_image and og_image.get("content"):
+        image_url = og_image["content"]
+
+    if not image_url:
+        twitter_img = soup.find("meta", attrs={"name": "twitter:image"})
+        if twitter_img:
+            image_url = twitter_img.get("content")
+
+    if not image_url:
+        target_container = soup.find("article") or soup.find("main") or soup
+        images = target_container.find_all("img")
+
+        for img in images:
+            src = img.get("src")
+            if not src:
+                continue
+
+            if any(
+                x in src.lower()
+                for x in [".svg", "logo", "icon", "avatar", "spacer"]
+            ):
+                continue
+
+            width = img.get("width")
+            if width and width.isdigit() and int(width) < 200:
+                continue
+
+            image_url = src
+            break
+
+    return headline, main_text, image_url
+
+
+async def _download_image(image_url):
+    response = await fetch(image_url)
+    response.raise_for_status()
+    return response.content
+
+
+async def scrape_page(url, content):
+    """
+    Extract (headline, main_text, image_bytes) from an already fetched page.
+    The image download starts as soon as an og:image/twitter:image URL is
+    found and runs while the page text is being extracted; if it fails, the
+    image the full extraction picked is tried instead.
+    """
+    image_task = None
+    early_image_url = _find_meta_image(content)
+    if early_image_url:
+        early_image_url = urljoin(url, early_image_url)
+        image_task = asyncio.create_task(_download_image(early_image_url))
+
+    try:
+        headline, main_text, image_url = await run_in_pool("scrape", _extract, content)
+
+        if image_task is None and image_url:
+            image_task = asyncio.create_task(_download_image(urljoin(url, image_url)))
+
+        if not headline or image_task is None:
+            print(" Failed to find critical content.")
+            return None, None, None
 
         print(
             f"Success: {headline[:30]}... | Text Length: {len(main_text) if main_text else 0} chars"
         )
 
-        img_response = requests.get(image_url, headers=headers, timeout=10)
-        return headline, main_text, img_response.content
+        try:
+            image_bytes = await image_task
+        except Exception as e:
+            fallback_url = urljoin(url, image_url) if image_url else None
+            if not early_image_url or not fallback_url or fallback_url == early_image_url:
+                raise
+            print(f" Meta image download failed ({e}), trying {fallback_url}")
+            image_bytes = await _download_image(fallback_url)
+        return headline, main_text, image_bytes
+    finally:
+        if image_task is not None and not image_task.done():
+            image_task.cancel()
 
+
+async def _scrape(url):
+    response = await fetch(url)
+    response.raise_for_status()
+    return await scrape_page(url, response.content)
+
+
+async def scrape_article(url: str):
+    print(f"Sophisticated Scraper Target: {url}")
+
+    try:
+        return await asyncio.wait_for(_scrape(url), timeout=config.SCRAPE_TOTAL_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f" Scraper timed out after {config.SCRAPE_TOTAL_TIMEOUT}s")
+        return None, None, None
     except Exception as e:
         print(f" Critical Scraper Error: {e}")
         return None, None, None
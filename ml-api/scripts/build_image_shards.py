@@ -0,0 +1,33 @@
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.models.image_store import ImageShardStore, IMAGE_BYTES
+
+IMAGE_DIR = "data/images"
+SHARD_DIR = "data/image_shards"
+SHARD_SIZE = 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack data/images into memory-mapped uint8 training shards")
+    parser.add_argument("--image-dir", default=IMAGE_DIR)
+    parser.add_argument("--output", default=SHARD_DIR)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    args = parser.parse_args()
+
+    store = ImageShardStore(args.output, shard_size=args.shard_size)
+    print(f" Existing index: {len(store)} images in {len(store.shard_counts)} shards")
+
+    added, missing = store.update(args.image_dir)
+
+    total = sum(store.shard_counts)
+    print(" Finished!")
+    print(f"   Added: {added}")
+    print(f"   Undecodable (flagged missing, retried next run): {missing}")
+    print(f"   Total: {total} images, {total * IMAGE_BYTES / 1e9:.2f} GB in {len(store.shard_counts)} shards")
+
+
+if __name__ == "__main__":
+    main()
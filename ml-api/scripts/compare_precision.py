@@ -0,0 +1,131 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.db import engine
+from app.models.streaming import iter_dataset_rows, split_of
+from app.services.predictor import FakeNewsPredictor, PRECISIONS
+
+IMAGE_DIR = "data/images"
+MODEL_PATH = "best_model.pth"
+STATS_PATH = "model_stats.json"
+BATCH_SIZE = 16
+
+
+async def get_rows_by_id(ids):
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT id, text, label FROM dataset_samples WHERE id = ANY(:ids) ORDER BY id"),
+            {"ids": [uuid.UUID(row_id) for row_id in ids]},
+        )
+        return result.mappings().all()
+
+
+def get_held_out_rows(stats_path, limit):
+    """
+    Up to `limit` rows the model was validated on but never trained on: the
+    validation ids train.py recorded next to its model_stats.json, or, for a
+    --stream model, the split_of validation split.
+    """
+    with open(stats_path) as f:
+        stats = json.load(f)
+
+    if stats.get("validation_ids_file") and os.path.exists(stats["validation_ids_file"]):
+        with open(stats["validation_ids_file"]) as f:
+            ids = json.load(f)
+        return asyncio.run(get_rows_by_id(ids[:limit]))
+
+    if stats.get("validation_split") == "split_of":
+        rows = []
+        for row in iter_dataset_rows():
+            if split_of(row['id'], stats["val_fraction"], stats["split_seed"]) == "val":
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    raise SystemExit(
+        f" {stats_path} records no validation split (trained before it was recorded, or by "
+        "--mode incremental), so there is no held-out set to compare on. Retrain first."
+    )
+
+
+def load_samples(rows):
+    samples = []
+    for row in rows:
+        image_path = os.path.join(IMAGE_DIR, f"{row['id']}.jpg")
+        if not os.path.exists(image_path):
+            continue
+        with open(image_path, "rb") as f:
+            samples.append((row["text"], f.read(), row["label"]))
+    return samples
+
+
+def evaluate(predictor, samples):
+    predictions = []
+    latencies = []
+    for i in range(0, len(samples), BATCH_SIZE):
+        batch = samples[i:i + BATCH_SIZE]
+        start = time.perf_counter()
+        predictions.extend(predictor.predict_batch([s[0] for s in batch], [s[1] for s in batch]))
+        latencies.append((time.perf_counter() - start) / len(batch))
+
+    correct = sum(
+        1 for result, sample in zip(predictions, samples)
+        if result["label"].lower() == sample[2]
+    )
+    return predictions, {
+        "accuracy": round(100 * correct / len(samples), 2),
+        "ms_per_sample": round(1000 * sum(latencies) / len(latencies), 2),
+        "samples_per_second": round(len(latencies) / sum(latencies), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy/latency parity between serving precisions")
+    parser.add_argument("--modes", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--limit", type=int, default=400)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--stats-path", default=STATS_PATH, help="the model's model_stats.json")
+    args = parser.parse_args()
+
+    rows = get_held_out_rows(args.stats_path, args.limit)
+    samples = load_samples(rows)
+    print(f" Held-out sample: {len(samples)} rows with images (of {len(rows)} fetched)")
+    if not samples:
+        return
+
+    report = {}
+    reference = None
+    for mode in args.modes:
+        predictor = FakeNewsPredictor(model_path=args.model_path, precision=mode)
+        if predictor.precision != mode:
+            print(f" Skipping {mode}: not supported here")
+            continue
+        predictions, stats = evaluate(predictor, samples)
+
+        if reference is None:
+            reference = predictions
+        else:
+            agree = sum(a["label"] == b["label"] for a, b in zip(reference, predictions))
+            stats["label_agreement"] = round(100 * agree / len(samples), 2)
+            stats["max_prob_diff"] = round(max(
+                abs(a["fake_probability"] - b["fake_probability"])
+                for a, b in zip(reference, predictions)
+            ), 4)
+
+        report[mode] = stats
+        print(f" {mode}: {stats}")
+        del predictor
+
+    print("\n" + json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
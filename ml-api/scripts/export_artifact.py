@@ -0,0 +1,31 @@
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transformers import BertTokenizerFast
+
+from app.models.artifact import load_checkpoint_weights, save_artifact
+from app.models.backbones import TOKENIZER_NAME
+
+MODEL_PATH = "best_model.pth"
+ARTIFACT_PATH = "model.safetensors"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack best_model.pth into a single-file serving artifact")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    print(f" Loading weights from {args.model_path}...")
+    model = load_checkpoint_weights(args.model_path)
+    tokenizer = BertTokenizerFast.from_pretrained(TOKENIZER_NAME)
+
+    print(f" Writing {args.output}...")
+    save_artifact(model, tokenizer, args.output, source=os.path.abspath(args.model_path))
+    print(f" Exported! Serve it with MODEL_PATH={args.output}")
+
+
+if __name__ == "__main__":
+    main()
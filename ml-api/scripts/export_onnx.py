@@ -0,0 +1,55 @@
+import sys
+import os
+import argparse
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.models.artifact import load_checkpoint_weights
+
+MODEL_PATH = "best_model.pth"
+ONNX_PATH = "model.onnx"
+OPSET = 17
+
+
+def export_onnx(model, onnx_path, opset=OPSET, seq_len=128):
+    """Export FakeNewsClassifier with dynamic batch and sequence axes."""
+    model.eval()
+    dummy_ids = torch.ones((2, seq_len), dtype=torch.long)
+    dummy_mask = torch.ones((2, seq_len), dtype=torch.long)
+    dummy_images = torch.randn(2, 3, 224, 224)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask, dummy_images),
+            onnx_path,
+            input_names=["input_ids", "attention_mask", "images"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "images": {0: "batch"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export best_model.pth to ONNX")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--output", default=ONNX_PATH)
+    parser.add_argument("--opset", type=int, default=OPSET)
+    args = parser.parse_args()
+
+    print(f" Loading weights from {args.model_path}...")
+    model = load_checkpoint_weights(args.model_path)
+
+    print(f" Exporting to {args.output} (opset {args.opset})...")
+    export_onnx(model, args.output, opset=args.opset)
+    print(f" Exported! Serve it with INFERENCE_BACKEND=onnx ONNX_MODEL_PATH={args.output}")
+
+
+if __name__ == "__main__":
+    main()
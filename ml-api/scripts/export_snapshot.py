@@ -0,0 +1,30 @@
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.db import iter_rows
+from app.models.snapshot import write_snapshot, manifest_path
+
+SNAPSHOT_PATH = "data/snapshots/dataset_samples.parquet"
+FETCH_SIZE = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export dataset_samples to a Parquet snapshot")
+    parser.add_argument("--output", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    print(" Exporting dataset_samples snapshot...")
+    rows = iter_rows(
+        "SELECT id, text, label, image_url, metadata FROM dataset_samples ORDER BY id", fetch_size=FETCH_SIZE
+    )
+    manifest = write_snapshot(rows, args.output)
+
+    print(f" Wrote {manifest['rows']} rows to {os.path.abspath(args.output)}")
+    print(f"   Content hash: {manifest['content_hash']}")
+    print(f"   Manifest: {os.path.abspath(manifest_path(args.output))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+STUB_DELAY_SECONDS = float(os.getenv("STUB_DELAY_SECONDS", "0.2"))
+STUB_PORT = int(os.getenv("STUB_PORT", "8099"))
+
+app = FastAPI(title="Groq API Stub")
+calls = {"count": 0}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Minimal OpenAI-compatible chat completion, enough for the Groq SDK."""
+    body = await request.json()
+    calls["count"] += 1
+    await asyncio.sleep(STUB_DELAY_SECONDS)
+
+    prompt = body["messages"][-1]["content"]
+    label = "Fake" if "flagged this as Fake" in prompt else "Real"
+
+    return {
+        "id": f"stub-{calls['count']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": f" Stub analysis: this reads as {label}. ",
+                },
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.get("/calls")
+async def get_calls():
+    return calls
+
+
+if __name__ == "__main__":
+    print(f" Groq stub listening on http://127.0.0.1:{STUB_PORT} (set GROQ_BASE_URL to this)")
+    uvicorn.run(app, host="127.0.0.1", port=STUB_PORT)
@@ -0,0 +1,36 @@
+import sys
+import os
+import argparse
+from transformers import BertTokenizerFast
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.db import iter_rows
+from app.models.dataset import TOKENIZER_NAME
+from app.models.token_store import TokenStore
+
+TOKEN_STORE_DIR = "data/tokens"
+MAX_LEN = 128
+FETCH_SIZE = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-tokenize dataset_samples into a memory-mapped token store")
+    parser.add_argument("--output", default=TOKEN_STORE_DIR)
+    parser.add_argument("--max-len", type=int, default=MAX_LEN)
+    args = parser.parse_args()
+
+    print(f" Pre-tokenizing dataset_samples with {TOKENIZER_NAME} (max_len={args.max_len})...")
+    tokenizer = BertTokenizerFast.from_pretrained(TOKENIZER_NAME)
+    rows = iter_rows("SELECT id, text FROM dataset_samples ORDER BY id", fetch_size=FETCH_SIZE)
+    store = TokenStore.build(
+        rows, tokenizer, args.output, tokenizer_name=TOKENIZER_NAME, max_len=args.max_len
+    )
+
+    lengths = store.lengths()
+    print(f" Wrote {len(store)} rows to {os.path.abspath(args.output)}")
+    if len(store):
+        print(f"   Mean length: {lengths.mean():.1f} tokens, max: {lengths.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,24 @@ from sqlalchemy import text
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app.core.db import engine
 from app.models.dataset import FakeNewsDataset
+from app.models.batching import pad_collate
+from app.models.snapshot import load_snapshot_rows
 
 IMAGE_DIR = "data/images"
+SNAPSHOT_PATH = "data/snapshots/dataset_samples.parquet"
 
 async def test_dataloader():
     print(" Testing PyTorch Dataset & DataLoader...")
 
-    async with engine.connect() as conn:
-        result = await conn.execute(text("SELECT id, text, label FROM dataset_samples LIMIT 32"))
-        rows = result.mappings().all()
+    if os.path.exists(SNAPSHOT_PATH):
+        rows = load_snapshot_rows(SNAPSHOT_PATH)[:32]
+        print(f" Loaded {len(rows)} rows from {SNAPSHOT_PATH}.")
+    else:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT id, text, label FROM dataset_samples LIMIT 32"))
+            rows = result.mappings().all()
 
-    print(f" Loaded {len(rows)} rows from DB.")
+        print(f" Loaded {len(rows)} rows from DB.")
 
     transform = transforms.Compose([
         transforms.Resize((224, 224)),
@@ -29,7 +36,7 @@ async def test_dataloader():
 
     dataset = FakeNewsDataset(rows, IMAGE_DIR, transform=transform)
 
-    loader = DataLoader(dataset, batch_size=4, shuffle=True)
+    loader = DataLoader(dataset, batch_size=4, shuffle=True, collate_fn=pad_collate)
 
     try:
         batch = next(iter(loader))
@@ -0,0 +1,57 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+from groq import AsyncGroq
+from scripts.groq_stub import app as stub_app, calls, STUB_PORT
+from app.services.llm import SummaryService, FALLBACK_SUMMARY
+
+TEXT = "Alien spaceships land in Times Square, offering free pizza to every tourist in sight!"
+
+
+def start_stub():
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=STUB_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def check_summary_service():
+    client = AsyncGroq(api_key="stub-key", base_url=f"http://127.0.0.1:{STUB_PORT}", max_retries=0)
+    service = SummaryService(llm_client=client, timeout=5.0)
+
+    print(" Sending 5 identical concurrent prompts...")
+    summaries = await asyncio.gather(*[service.summarize(TEXT, "Fake", 97.3) for _ in range(5)])
+    print(f"   Summaries: {set(summaries)}")
+    print(f"   Upstream calls: {calls['count']}")
+    assert len(set(summaries)) == 1 and calls["count"] == 1, "Concurrent prompts were not coalesced"
+
+    print(" Repeating with a confidence in the same bucket...")
+    await service.summarize(TEXT, "Fake", 96.1)
+    assert calls["count"] == 1, "Summary cache missed"
+
+    print(" Checking the timeout budget...")
+    slow = SummaryService(llm_client=client, timeout=0.01)
+    assert await slow.summarize(TEXT, "Real", 60.0) == FALLBACK_SUMMARY, "Timeout was not enforced"
+
+    print(" Summary service verified against the Groq stub!")
+
+
+def test_summary_service():
+    server = start_stub()
+    try:
+        asyncio.run(check_summary_service())
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    test_summary_service()
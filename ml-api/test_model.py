@@ -1,9 +1,10 @@
 import torch
+from app.models.backbones import MODEL_VARIANTS
 from app.models.classifier import FakeNewsClassifier
 
-def test_model():
-    print(" Initializing FakeNewsClassifier...")
-    model = FakeNewsClassifier()
+def test_model(variant="full"):
+    print(f" Initializing FakeNewsClassifier ({variant})...")
+    model = FakeNewsClassifier.from_variant(variant)
     print(" Model loaded.")
 
     dummy_text_ids = torch.randint(0, 1000, (2, 128))  
@@ -22,4 +23,5 @@ def test_model():
         print(" Shape mismatch.")
 
 if __name__ == "__main__":
-    test_model()
\ No newline at end of file
+    for variant in MODEL_VARIANTS:
+        test_model(variant)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import sys
+import os
+import io
+import tempfile
+import time
+
+import torch
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.services.predictor import FakeNewsPredictor
+from app.services.onnx_predictor import OnnxFakeNewsPredictor
+from scripts.export_onnx import export_onnx
+
+MODEL_PATH = "best_model.pth"
+TEXTS = [
+    "Alien spaceships land in Times Square, offering free pizza to tourists!",
+    "City council approves new budget for road repairs.",
+    "Scientists confirm the moon is made of cheese",
+    "Local team wins regional championship after overtime thriller",
+]
+RUNS = 5
+
+
+def make_image(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def time_batch(predictor, texts, images):
+    predictor.predict_batch(texts, images)
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        results = predictor.predict_batch(texts, images)
+    return results, 1000 * (time.perf_counter() - start) / RUNS
+
+
+def test_onnx_parity():
+    images = [make_image(c) for c in ("red", "green", "blue", "white")]
+
+    torch_predictor = FakeNewsPredictor(model_path=MODEL_PATH, precision="fp32")
+    torch_predictor.device = torch.device("cpu")
+    torch_predictor.model.to(torch_predictor.device)
+    # Repeated timing runs would otherwise be served from the tower caches.
+    torch_predictor.text_cache = torch_predictor.image_cache = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_path = os.path.join(tmp, "model.onnx")
+        print(" Exporting to ONNX...")
+        export_onnx(torch_predictor.model, onnx_path)
+        onnx_predictor = OnnxFakeNewsPredictor(model_path=onnx_path)
+
+        for batch_size in (1, len(TEXTS)):
+            texts, batch_images = TEXTS[:batch_size], images[:batch_size]
+            torch_results, torch_ms = time_batch(torch_predictor, texts, batch_images)
+            onnx_results, onnx_ms = time_batch(onnx_predictor, texts, batch_images)
+
+            max_diff = max(
+                abs(a["fake_probability"] - b["fake_probability"])
+                for a, b in zip(torch_results, onnx_results)
+            )
+            print(f"\n Batch size {batch_size}")
+            print(f"   PyTorch:      {torch_ms:.1f} ms/batch")
+            print(f"   ONNX Runtime: {onnx_ms:.1f} ms/batch ({torch_ms / onnx_ms:.2f}x)")
+            print(f"   Max fake_probability diff: {max_diff:.6f}")
+
+            assert max_diff < 1e-3, "ONNX output drifted from PyTorch"
+            assert [r["label"] for r in torch_results] == [r["label"] for r in onnx_results]
+
+    print("\n ONNX backend matches PyTorch!")
+
+
+if __name__ == "__main__":
+    test_onnx_parity()
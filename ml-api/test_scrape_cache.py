@@ -0,0 +1,142 @@
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.services import scrape_cache
+from app.services.scrape_cache import DiskCache, ScrapeCache, canonicalize_url
+
+URL = "https://example.com/story"
+
+
+def entry(image_size, fetched_at=None, **extra):
+    return {
+        "url": URL,
+        "headline": "Headline",
+        "text": "Body",
+        "image": b"x" * image_size,
+        "etag": '"v1"',
+        "last_modified": None,
+        "fetched_at": time.time() if fetched_at is None else fetched_at,
+        **extra,
+    }
+
+
+def test_canonicalize_url():
+    print(" Checking URL canonicalization...")
+    assert canonicalize_url("HTTPS://Example.COM:443/a?b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert canonicalize_url(
+        "https://example.com/a?utm_source=x&fbclid=y&id=7&UTM_medium=z"
+    ) == "https://example.com/a?id=7"
+    assert canonicalize_url("  https://example.com/a?q=  ") == "https://example.com/a?q="
+
+
+def test_disk_cache_eviction():
+    print(" Checking DiskCache eviction, temp files and index rebuild...")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=2500)
+        for i in range(3):
+            cache.save(f"key{i}", entry(1000))
+            time.sleep(0.01)
+
+        # key0 was least recently used, and goes as a whole entry.
+        assert cache.load("key0") is None
+        assert cache.load("key1")["image"] == b"x" * 1000
+        assert len(os.listdir(directory)) == 4
+        assert cache._total == sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory))
+
+        # key1 was just read, so key2 is evicted next.
+        cache.save("key3", entry(1000))
+        assert cache.load("key2") is None and cache.load("key1") is not None
+
+        open(os.path.join(directory, "leftover.tmp"), "wb").close()
+        rebuilt = DiskCache(directory, max_bytes=2500)
+        assert not any(name.endswith(".tmp") for name in os.listdir(directory))
+        assert rebuilt._total == cache._total
+        assert set(rebuilt._entries) == set(cache._entries)
+
+
+def test_disk_cache_concurrent_saves():
+    print(" Checking concurrent saves of the same key...")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=10 ** 9)
+        threads = [
+            threading.Thread(target=cache.save, args=("same", entry(1000 + i))) for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        loaded = cache.load("same")
+        assert len(loaded["image"]) in range(1000, 1020)
+        assert len(os.listdir(directory)) == 2
+
+
+def test_disk_cache_max_age():
+    print(" Checking DiskCache expiry...")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=10 ** 9, max_age=60)
+        cache.save("old", entry(10, fetched_at=time.time() - 120))
+        cache.save("new", entry(10))
+        assert cache.load("old") is None
+        assert cache.load("new") is not None
+        assert len(os.listdir(directory)) == 2
+
+
+def scrape_with(cache, fetch):
+    scrape_cache.fetch = fetch
+    return asyncio.run(cache.scrape_article(URL))
+
+
+def test_stale_policy():
+    print(" Checking when a stale copy is served...")
+    request = httpx.Request("GET", URL)
+
+    async def server_error(url, extra_headers=None):
+        return httpx.Response(503, request=request)
+
+    async def gone(url, extra_headers=None):
+        return httpx.Response(404, request=request)
+
+    async def unreachable(url, extra_headers=None):
+        raise httpx.ConnectError("down", request=request)
+
+    async def forbidden(url, extra_headers=None):
+        return httpx.Response(403, request=request)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ScrapeCache(directory, ttl=60, memory_entries=16, memory_bytes=10 ** 6,
+                            disk_bytes=10 ** 6, max_stale=3600)
+        key = canonicalize_url(URL)
+
+        cache.disk.save(key, entry(10, fetched_at=time.time() - 120))
+        assert scrape_with(cache, server_error)[0] == "Headline"
+        assert scrape_with(cache, unreachable)[0] == "Headline"
+        assert scrape_with(cache, forbidden)[0] is None
+
+        # Too old to serve, even on a network error.
+        cache.memory.clear()
+        cache.disk.save(key, entry(10, fetched_at=time.time() - 7200))
+        assert scrape_with(cache, unreachable)[0] is None
+
+        # A deleted article is dropped from both tiers.
+        cache.disk.save(key, entry(10, fetched_at=time.time() - 120))
+        assert scrape_with(cache, gone)[0] is None
+        assert key not in cache.memory and cache.disk.load(key) is None
+        assert scrape_with(cache, server_error)[0] is None
+
+
+if __name__ == "__main__":
+    test_canonicalize_url()
+    test_disk_cache_eviction()
+    test_disk_cache_concurrent_saves()
+    test_disk_cache_max_age()
+    test_stale_policy()
+    print(" Scrape cache verified!")
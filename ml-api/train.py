@@ -1,35 +1,239 @@
+import argparse
 import asyncio
+import contextlib
+import itertools
 import os
 import torch
 import torch.nn as nn
 import json
+import hashlib
+import time
 from datetime import datetime
-from torch.utils.data import DataLoader, random_split
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, Subset, TensorDataset, random_split
 from torchvision import transforms
 from sqlalchemy import text
 from tqdm import tqdm
 import sys
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from app.core.db import engine
-from app.models.dataset import FakeNewsDataset
+from app.models.dataset import FakeNewsDataset, worker_init_fn
+from app.models.batching import LengthBucketBatchSampler, pad_collate
+from app.models.token_store import TokenStore
+from app.models.image_store import ImageShardStore
+from app.models.features import FeatureStore
+from app.models.streaming import StreamingFakeNewsDataset, split_of
+from app.models.snapshot import load_snapshot_rows, read_manifest
+from app.models.backbones import DEFAULT_VARIANT, MODEL_VARIANTS, variant_paths
 from app.models.classifier import FakeNewsClassifier
+from app.models.artifact import is_artifact, load_artifact, load_checkpoint_weights
+from app.models.distillation import TeacherLogitStore, distillation_loss, measure, teacher_fingerprint
+from app.models.checkpoint import CheckpointWriter, capture_rng_state, load_checkpoint, restore_rng_state, save_atomic
+from app.models.precision import autocast, bf16_supported
+from app.models.distributed import (
+    all_reduce_sum, broadcast_object, cleanup_distributed, init_distributed, is_distributed, is_main_process, rank,
+    world_size,
+)
 
 IMAGE_DIR = "data/images"
-BATCH_SIZE = 16        
-EPOCHS = 3           
-LEARNING_RATE = 2e-5   
-SAVE_PATH = "best_model.pth"
+TOKEN_STORE_DIR = "data/tokens"  # written by scripts/pretokenize.py
+IMAGE_SHARD_DIR = "data/image_shards"  # written by scripts/build_image_shards.py
+FEATURE_DIR = "data/features"  # written by --mode frozen
+SNAPSHOT_PATH = "data/snapshots/dataset_samples.parquet"  # written by scripts/export_snapshot.py
+BATCH_SIZE = 16
+MAX_SEQ_LEN = 128
+EPOCHS = 3
+LEARNING_RATE = 2e-5
+# "full" (BERT + ResNet50) or "small" (DistilBERT + ResNet18, for cheap
+# serving nodes). Each variant has its own weights and stats files:
+# best_model.pth / model_stats.json for "full", best_model_small.pth /
+# model_stats_small.json for "small".
+VARIANT = DEFAULT_VARIANT
+SAVE_PATH, STATS_PATH = variant_paths(VARIANT)
+# bf16 autocast halves activation memory; gradient accumulation sums
+# ACCUM_STEPS batches per optimizer step, so the effective batch size is
+# BATCH_SIZE * ACCUM_STEPS without holding that many samples at once.
+PRECISION = "fp32"
+ACCUM_STEPS = 1
+# Full training state (model, optimizer, epoch, batch position, RNG) for
+# --resume. Written in the background at the end of every epoch and, with
+# --checkpoint-every, every N optimizer steps.
+CHECKPOINT_PATH = "checkpoints/last.pt"
+CHECKPOINT_EVERY = 0
+# Stop after this many epochs without a better validation accuracy (0 = never).
+PATIENCE = 0
+
+# Frozen-backbone mode only trains the MLP head on cached features, so it can
+# afford far more epochs and a much larger batch.
+HEAD_EPOCHS = 100
+HEAD_BATCH_SIZE = 256
+HEAD_LEARNING_RATE = 1e-3
+SPLIT_SEED = 42
+
+# --mode incremental continues best_model.pth on rows newer than the
+# data_watermark in model_stats.json, plus REPLAY_RATIO older rows per new
+# row so the model does not forget what it already learned.
+INCREMENTAL_EPOCHS = 2
+INCREMENTAL_LEARNING_RATE = 1e-5
+REPLAY_RATIO = 0.5
+
+# --mode distill trains a small student (by default the "small" variant)
+# against the frozen best_model.pth teacher: DISTILL_ALPHA of the loss is
+# the KL divergence to the teacher's logits softened by DISTILL_TEMPERATURE,
+# the rest plain cross entropy on the labels. The teacher's logits are
+# computed once and cached in TEACHER_LOGITS_DIR.
+TEACHER_PATH = SAVE_PATH
+TEACHER_STATS_PATH = STATS_PATH
+TEACHER_LOGITS_DIR = "data/teacher_logits"
+DISTILL_STUDENT = "small"
+DISTILL_EPOCHS = 5
+DISTILL_LEARNING_RATE = 5e-5
+DISTILL_TEMPERATURE = 2.0
+DISTILL_ALPHA = 0.7
+DISTILL_REPORT_PATH = "distill_report.json"
+
+# Input pipeline. Workers decode images and tokenize in parallel with the
+# training step; pinned memory only helps (and is only supported) on CUDA.
+NUM_WORKERS = min(4, os.cpu_count() or 1)
+PREFETCH_FACTOR = 2
+PERSISTENT_WORKERS = True
+PIN_MEMORY = torch.cuda.is_available()
+
+# Rows a database-backed (non --stream) run trains on, oldest first.
+DB_ROW_LIMIT = 2000
+# --stream reads the whole table page by page instead of LIMIT 2000.
+STREAM_PAGE_SIZE = 1000
+STREAM_SHUFFLE_BUFFER = 5000
+VAL_FRACTION = 0.2
 
 async def get_data_rows():
-    """Fetch all valid rows from DB"""
+    """
+    Fetch the oldest DB_ROW_LIMIT rows. Oldest first (ids are random UUIDs),
+    so the set only changes when the table grows past it, and every row not
+    loaded is newer than the ones that were (see watermark_stats).
+    """
+    # Imported here, not at module level, so --snapshot runs need no DATABASE_URL.
+    from app.core.db import engine
+
     async with engine.connect() as conn:
-        result = await conn.execute(text("SELECT id, text, label FROM dataset_samples LIMIT 2000"))
+        result = await conn.execute(
+            text("SELECT id, text, label, created_at FROM dataset_samples "
+                 "ORDER BY created_at NULLS FIRST, id LIMIT :limit"),
+            {"limit": DB_ROW_LIMIT},
+        )
         rows = result.mappings().all()
+    await engine.dispose()
+    # Plain dicts pickle cleanly into spawned DataLoader workers.
+    return [dict(row) for row in rows]
+
+async def get_watermark():
+    """Newest created_at in dataset_samples."""
+    from app.core.db import engine
+
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT max(created_at) FROM dataset_samples"))
+        watermark = result.scalar()
+    # Pooled connections belong to this event loop; later asyncio.run calls need fresh ones.
+    await engine.dispose()
+    return watermark
+
+async def get_incremental_rows(watermark, replay_ratio):
+    """Rows added after `watermark`, and a random sample of older rows to replay."""
+    from app.core.db import engine
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT id, text, label, created_at FROM dataset_samples "
+                 "WHERE created_at > :watermark ORDER BY created_at, id"),
+            {"watermark": watermark},
+        )
+        new_rows = [dict(row) for row in result.mappings().all()]
+
+        replay_rows = []
+        replay_limit = int(len(new_rows) * replay_ratio)
+        if replay_limit:
+            result = await conn.execute(
+                text("SELECT id, text, label FROM dataset_samples "
+                     "WHERE created_at <= :watermark ORDER BY random() LIMIT :limit"),
+                {"watermark": watermark, "limit": replay_limit},
+            )
+            replay_rows = [dict(row) for row in result.mappings().all()]
+    return new_rows, replay_rows
+
+def loader_kwargs(workers=NUM_WORKERS, persistent_workers=PERSISTENT_WORKERS,
+                  prefetch_factor=PREFETCH_FACTOR, pin_memory=PIN_MEMORY):
+    """DataLoader arguments for the input pipeline (shared by every loader in this file)."""
+    kwargs = {"num_workers": workers, "pin_memory": pin_memory, "collate_fn": pad_collate}
+    if workers > 0:
+        # Fast tokenizers warn (and can deadlock) when their thread pool is forked.
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        kwargs.update(
+            worker_init_fn=worker_init_fn,
+            persistent_workers=persistent_workers,
+            prefetch_factor=prefetch_factor,
+        )
+    return kwargs
+
+def load_rows(snapshot=None):
+    """Rows from a Parquet snapshot when given, otherwise from the database."""
+    if snapshot:
+        print(f" Loading data from snapshot {snapshot}...")
+        rows = load_snapshot_rows(snapshot)
+        print(f" Found {len(rows)} samples (snapshot {read_manifest(snapshot)['content_hash'][:12]}).")
+        return rows
+
+    print(" Loading data from Database...")
+    rows = asyncio.run(get_data_rows())
+    print(f" Found {len(rows)} samples.")
     return rows
 
-def train():
-    if torch.backends.mps.is_available():
+def snapshot_stats(snapshot):
+    """Extra model_stats.json fields recording which snapshot a model was trained on."""
+    if not snapshot:
+        return {}
+    return {"dataset_snapshot": os.path.abspath(snapshot), "dataset_hash": read_manifest(snapshot)['content_hash']}
+
+def ids_hash(ids):
+    return hashlib.sha256("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+
+def split_stats(rows, val_indices):
+    """
+    The validation rows of a run. save_stats writes them next to
+    model_stats.json, so evaluations of the saved model (--mode distill,
+    scripts/compare_precision.py) can stick to rows it was not trained on.
+    """
+    return {"validation_ids": sorted(str(rows[i]['id']) for i in val_indices)}
+
+def stream_split_stats():
+    """--stream holds out rows by split_of instead of a recorded id list."""
+    return {"validation_split": "split_of", "val_fraction": VAL_FRACTION, "split_seed": SPLIT_SEED}
+
+def watermark_stats(snapshot, rows=None):
+    """
+    model_stats.json field recording the newest created_at a database-backed
+    run covered; --mode incremental picks up after it. For a LIMITed run
+    that is the newest of the loaded `rows`; for --stream (no `rows`), the
+    newest row in the table when the run started.
+    """
+    if snapshot:
+        return {}
+    if rows is None:
+        watermark = asyncio.run(get_watermark())
+    else:
+        created = [row['created_at'] for row in rows if row['created_at'] is not None]
+        watermark = max(created, default=None)
+        if len(rows) == DB_ROW_LIMIT and watermark is not None:
+            # Rows sharing the newest created_at (one bulk insert shares its
+            # transaction's now()) may have been cut off by the LIMIT, so stop
+            # just before them; --mode incremental then trains them as new.
+            watermark = max((c for c in created if c < watermark), default=None)
+    return {"data_watermark": watermark.isoformat()} if watermark else {}
+
+def get_device():
+    if is_distributed():
+        device = torch.device("cpu")
+        print(f" Using CPU (rank {rank()} of {world_size()}, gloo)")
+    elif torch.backends.mps.is_available():
         device = torch.device("mps")
         print(" Using Apple M2 GPU (Metal Performance Shaders)")
     elif torch.cuda.is_available():
@@ -38,99 +242,855 @@ def train():
     else:
         device = torch.device("cpu")
         print(" Using CPU (Slow)")
+    return device
 
-    print(" Loading data from Database...")
-    rows = asyncio.run(get_data_rows())
-    print(f" Found {len(rows)} samples.")
-
-    transform = transforms.Compose([
+def build_transform():
+    return transforms.Compose([
         transforms.Resize((224, 224)),
         transforms.ToTensor(),
         transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
     ])
 
-    full_dataset = FakeNewsDataset(rows, IMAGE_DIR, transform=transform)
+def load_image_store():
+    if os.path.exists(os.path.join(IMAGE_SHARD_DIR, "index.json")):
+        image_store = ImageShardStore(IMAGE_SHARD_DIR)
+        print(f" Using preprocessed image shards with {len(image_store)} images.")
+        return image_store
+    return None
+
+def build_dataset(rows):
+    token_store = None
+    if os.path.exists(os.path.join(TOKEN_STORE_DIR, "meta.json")):
+        token_store = TokenStore(TOKEN_STORE_DIR)
+        print(f" Using pre-tokenized store with {len(token_store)} rows.")
+
+    return FakeNewsDataset(
+        rows, IMAGE_DIR, transform=build_transform(), max_len=MAX_SEQ_LEN,
+        token_store=token_store, image_store=load_image_store(),
+    )
+
+def save_stats(model, accuracy, total_samples, stats_path=STATS_PATH, **extra):
+    print("📝 Saving training statistics...")
+    stats = {
+        "accuracy": round(accuracy, 2),
+        "last_trained": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_samples": total_samples,
+        **model.describe(),
+        "architecture": "Multimodal (Image + Text)",
+    }
+    validation_ids = extra.pop("validation_ids", None)
+    if validation_ids is not None:
+        ids_path = os.path.splitext(stats_path)[0] + "_val_ids.json"
+        with open(ids_path, "w") as f:
+            json.dump(validation_ids, f)
+        extra.update(
+            validation_ids_file=ids_path,
+            validation_ids_hash=ids_hash(validation_ids),
+            validation_samples=len(validation_ids),
+        )
+    stats.update(extra)
+    with open(stats_path, "w") as f:
+        json.dump(stats, f, indent=4)
+    print(f" Stats saved to {stats_path}")
 
+def load_stats(stats_path=STATS_PATH):
+    if not os.path.exists(stats_path):
+        return {}
+    with open(stats_path) as f:
+        return json.load(f)
+
+def split_dataset(full_dataset):
+    """
+    80/20 train/val split, seeded so every DDP rank (and every run) gets the
+    same one. Only the length is used, so it also splits a plain row list.
+    """
     train_size = int(0.8 * len(full_dataset))
     val_size = len(full_dataset) - train_size
-    train_dataset, val_dataset = random_split(full_dataset, [train_size, val_size])
+    return random_split(
+        full_dataset, [train_size, val_size], generator=torch.Generator().manual_seed(SPLIT_SEED)
+    )
+
+def subset_loader(subset, shuffle, loader_options, batch_size=BATCH_SIZE):
+    """
+    Loader over a split_dataset half. Batches are drawn from rows of similar
+    length and padded to their longest member instead of always to MAX_SEQ_LEN.
+    """
+    lengths = subset.dataset.lengths()
+    sampler = LengthBucketBatchSampler([lengths[i] for i in subset.indices], batch_size, shuffle=shuffle)
+    return DataLoader(subset, batch_sampler=sampler, **loader_options)
+
+def build_loaders(rows, loader_options=None):
+    """Map-style loaders over the oldest 2000 rows (or a snapshot), bucketed by length."""
+    full_dataset = build_dataset(rows)
+    train_dataset, val_dataset = split_dataset(full_dataset)
+    loader_options = loader_options or loader_kwargs()
+
+    if is_distributed():
+        # Each rank trains on its own 1/world_size of the rows. Length buckets
+        # are not used here: ranks must run the same number of steps, which
+        # DistributedSampler guarantees by padding its shards to equal size.
+        train_sampler = DistributedSampler(train_dataset, shuffle=True, seed=SPLIT_SEED)
+        train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, sampler=train_sampler, **loader_options)
+        # Validation shards are disjoint and unpadded (DistributedSampler would
+        # repeat rows to even them out), so the all-reduced counts cover every
+        # validation row exactly once, as in a single-process run.
+        val_shard = Subset(full_dataset, val_dataset.indices[rank()::world_size()])
+        val_loader = subset_loader(val_shard, False, loader_options)
+        print(f" Rank {rank()}: training on {len(train_sampler)} of {len(train_dataset)} samples, "
+              f"validating on {len(val_shard)} of {len(val_dataset)} samples.")
+        return train_loader, val_loader, train_sampler
 
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE)
+    train_loader = subset_loader(train_dataset, True, loader_options)
+    val_loader = subset_loader(val_dataset, False, loader_options)
 
     print(f" Training on {len(train_dataset)} samples, Validating on {len(val_dataset)} samples.")
+    return train_loader, val_loader, train_loader.batch_sampler
 
-    model = FakeNewsClassifier()
+def build_streaming_loaders(loader_options=None):
+    """Iterable loaders over the whole table, split deterministically by row id."""
+    print(" Streaming data from Database (full table, keyset pagination)...")
+    transform = build_transform()
+    image_store = load_image_store()
+
+    def dataset(split, shuffle_buffer):
+        return StreamingFakeNewsDataset(
+            split, IMAGE_DIR, transform=transform, max_len=MAX_SEQ_LEN, image_store=image_store,
+            val_fraction=VAL_FRACTION, split_seed=SPLIT_SEED,
+            shuffle_buffer=shuffle_buffer, page_size=STREAM_PAGE_SIZE,
+        )
+
+    train_dataset = dataset("train", STREAM_SHUFFLE_BUFFER)
+    val_dataset = dataset("val", 0)
+
+    # Persistent workers would keep their copy of the dataset, so set_epoch
+    # would never reach them and every epoch would shuffle the same way.
+    loader_options = dict(loader_options or loader_kwargs())
+    if loader_options.get("persistent_workers"):
+        loader_options["persistent_workers"] = False
+
+    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, **loader_options)
+    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, **loader_options)
+    return train_loader, val_loader, train_dataset
+
+def evaluate(model, loader, device, precision=PRECISION, non_blocking=False):
+    """Returns (correct, total) for `model` over `loader`."""
+    model.eval()
+    correct = 0
+    total = 0
+
+    with torch.no_grad():
+        for batch in loader:
+            input_ids = batch['input_ids'].to(device, non_blocking=non_blocking)
+            attention_mask = batch['attention_mask'].to(device, non_blocking=non_blocking)
+            images = batch['image'].to(device, non_blocking=non_blocking)
+            labels = batch['label'].to(device, non_blocking=non_blocking)
+
+            with autocast(device, precision):
+                outputs = model(input_ids, attention_mask, images)
+
+            _, predicted = torch.max(outputs, 1)
+            total += labels.size(0)
+            correct += (predicted == labels).sum().item()
+    return correct, total
+
+def resolve_precision(precision, device):
+    if precision == "bf16" and not bf16_supported(device):
+        print(f" No native bf16 support on {device.type}, training in fp32 instead")
+        return "fp32"
+    return precision
+
+def train(stream=False, snapshot=None, loader_options=None, precision=PRECISION, accum_steps=ACCUM_STEPS,
+          resume=None, checkpoint_every=CHECKPOINT_EVERY, patience=PATIENCE, variant=VARIANT):
+    device = get_device()
+    save_path, stats_path = variant_paths(variant)
+    print(f" Variant: {variant} ({MODEL_VARIANTS[variant]['label']}) -> {save_path}")
+    precision = resolve_precision(precision, device)
+    effective_batch_size = BATCH_SIZE * accum_steps * world_size()
+    print(f" Precision: {precision} | Effective batch size: {effective_batch_size} "
+          f"({world_size()} x {accum_steps} x {BATCH_SIZE})")
+    loader_options = loader_options or loader_kwargs()
+    non_blocking = loader_options["pin_memory"]
+    print(f" Input pipeline: {loader_options['num_workers']} workers, pin_memory={non_blocking}")
+    if stream:
+        data_stats = {**watermark_stats(snapshot), **stream_split_stats()}
+        train_loader, val_loader, epoch_source = build_streaming_loaders(loader_options)
+    else:
+        rows = load_rows(snapshot)
+        data_stats = {**snapshot_stats(snapshot), **watermark_stats(snapshot, rows)}
+        train_loader, val_loader, epoch_source = build_loaders(rows, loader_options)
+        data_stats.update(split_stats(rows, split_dataset(rows)[1].indices))
+
+    model = FakeNewsClassifier.from_variant(variant)
     model.to(device)
+    # Unwrapped module, so checkpoints keep plain FakeNewsClassifier keys.
+    base_model = model
 
     optimizer = torch.optim.AdamW(model.parameters(), lr=LEARNING_RATE)
 
     criterion = nn.CrossEntropyLoss()
 
     best_accuracy = 0.0
+    stale_epochs = 0
+    start_epoch = 0
+    start_batch = 0
+    main_process = is_main_process()
 
-    for epoch in range(EPOCHS):
-        print(f"\nExample {epoch + 1}/{EPOCHS}")
-        print("-" * 10)
+    checkpoint = None
+    if resume:
+        # The checkpoint only exists on rank 0's host, so rank 0 reads it and
+        # every rank resumes from that copy: all ranks must agree on the
+        # weights, optimizer state and position, or the all-reduces hang.
+        if is_main_process() and os.path.exists(resume):
+            checkpoint = load_checkpoint(resume)
+        checkpoint = broadcast_object(checkpoint)
 
-        model.train()
+    if checkpoint is not None:
+        if checkpoint.get("finished"):
+            print(f" {resume} is from a finished run, nothing to resume.")
+            return
+        if checkpoint.get("variant", DEFAULT_VARIANT) != variant:
+            print(f" {resume} is a '{checkpoint.get('variant', DEFAULT_VARIANT)}' checkpoint, not '{variant}'; "
+                  f"pass the matching --variant or another --resume path.")
+            return
+        base_model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        restore_rng_state(checkpoint["rng"])
+        start_epoch, start_batch = checkpoint["epoch"], checkpoint["batch"]
+        if start_batch and checkpoint["world_size"] != world_size():
+            # Each rank's shard depends on the world size, so the saved
+            # position within the epoch no longer applies.
+            print(f" Checkpoint was written with {checkpoint['world_size']} ranks, restarting epoch {start_epoch + 1}.")
+            start_batch = 0
+        best_accuracy = checkpoint["best_accuracy"]
+        stale_epochs = checkpoint["stale_epochs"]
+        # Keep the watermark from when the run started, rows added since
+        # then were never trained on.
+        data_stats = checkpoint.get("data_stats", data_stats)
+        print(f" Resuming from {resume} at epoch {start_epoch + 1}, batch {start_batch} "
+              f"(best accuracy so far {best_accuracy:.2f}%)")
+    elif resume:
+        print(f" No checkpoint at {resume}, starting from scratch.")
+
+    # Wrapped only after resuming, so DDP starts every rank from the same
+    # (possibly restored) weights.
+    if is_distributed():
+        model = DistributedDataParallel(model)
+
+    checkpoint_path = resume or CHECKPOINT_PATH
+    writer = CheckpointWriter()
+
+    def checkpoint_state(epoch, batch, finished=False):
+        # Rank 0's RNG state stands in for every rank's on resume.
+        return {
+            "model": base_model.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "epoch": epoch,
+            "batch": batch,
+            "best_accuracy": best_accuracy,
+            "stale_epochs": stale_epochs,
+            "finished": finished,
+            "rng": capture_rng_state(),
+            "world_size": world_size(),
+            "data_stats": data_stats,
+            "variant": variant,
+        }
+
+    try:
+        for epoch in range(start_epoch, EPOCHS):
+            if main_process:
+                print(f"\nExample {epoch + 1}/{EPOCHS}")
+                print("-" * 10)
+
+            model.train()
+            epoch_source.set_epoch(epoch)
+            skip = start_batch if epoch == start_epoch else 0
+            batches = train_loader
+            if skip and hasattr(epoch_source, "skip_batches"):
+                epoch_source.skip_batches(skip)
+            elif skip:
+                # No way to seek these samplers, so re-read and drop the batches.
+                batches = itertools.islice(train_loader, skip, None)
+            total_loss = 0
+            train_batches = skip
+            train_samples = 0
+            data_time = 0.0
+            compute_time = 0.0
+            pending_grads = False
+            window_batches = 0
+
+            def step():
+                # Every micro-batch's loss was divided by accum_steps; a short
+                # last window (or one cut by DDP's epoch end) is scaled back up
+                # so its step averages over the batches it actually holds.
+                if window_batches != accum_steps:
+                    for param in base_model.parameters():
+                        if param.grad is not None:
+                            param.grad.mul_(accum_steps / window_batches)
+                optimizer.step()
+                optimizer.zero_grad()
+
+            optimizer.zero_grad()
+            loop = tqdm(batches, leave=True, disable=not main_process)
+            step_end = time.perf_counter()
+            for batch in loop:
+                step_start = time.perf_counter()
+                data_time += step_start - step_end
+
+                input_ids = batch['input_ids'].to(device, non_blocking=non_blocking)
+                attention_mask = batch['attention_mask'].to(device, non_blocking=non_blocking)
+                images = batch['image'].to(device, non_blocking=non_blocking)
+                labels = batch['label'].to(device, non_blocking=non_blocking)
+
+                train_batches += 1
+                window_batches += 1
+                stepping = train_batches % accum_steps == 0 or (is_distributed() and train_batches == len(train_loader))
+                # Under DDP, gradients are only all-reduced on the micro-batch
+                # that ends an accumulation window.
+                sync = model.no_sync() if is_distributed() and not stepping else contextlib.nullcontext()
+
+                with sync:
+                    with autocast(device, precision):
+                        outputs = model(input_ids, attention_mask, images)
+                    loss = criterion(outputs.float(), labels)
+                    (loss / accum_steps).backward()
+
+                pending_grads = not stepping
+                if stepping:
+                    step()
+                    window_batches = 0
+                    if checkpoint_every and main_process and (train_batches // accum_steps) % checkpoint_every == 0:
+                        writer.save({checkpoint_path: checkpoint_state(epoch, train_batches)})
+
+                # .item() waits for the device, so compute_time covers the whole step.
+                total_loss += loss.item()
+                train_samples += labels.size(0)
+                loop.set_description(f"Loss: {loss.item():.4f}")
+
+                step_end = time.perf_counter()
+                compute_time += step_end - step_start
+
+            if pending_grads:
+                # Flush the gradients of a last, partial accumulation window.
+                step()
+
+            # Counts cover only the batches run in this process (not ones
+            # skipped on resume).
+            total_loss, run_batches, train_samples = all_reduce_sum(total_loss, train_batches - skip, train_samples)
+            train_samples = int(train_samples)
+            avg_train_loss = total_loss / max(run_batches, 1)
+            step_time = data_time + compute_time
+            # Ranks step in lockstep, so samples from all of them over this
+            # rank's wall time is the job's throughput.
+            throughput = train_samples / step_time if step_time > 0 else 0.0
+            if main_process:
+                print(f" Average Train Loss: {avg_train_loss:.4f}")
+            if main_process and step_time > 0:
+                print(
+                    f" Data wait: {data_time:.1f}s ({100 * data_time / step_time:.0f}%) | "
+                    f"Compute: {compute_time:.1f}s | {throughput:.1f} samples/s ({precision})"
+                )
+
+            # The unwrapped module: DDP's forward broadcasts buffers, which would
+            # need every rank to run as many validation batches as the others.
+            correct, total = evaluate(base_model, val_loader, device, precision, non_blocking)
+
+            # Every rank gets the same totals, so all of them agree on whether
+            # this epoch is the new best and on early stopping.
+            correct, total = all_reduce_sum(correct, total)
+            total = int(total)
+            accuracy = 100 * correct / total
+            if main_process:
+                print(f" Validation Accuracy: {accuracy:.2f}% ({precision})")
+
+            improved = accuracy > best_accuracy
+            if improved:
+                best_accuracy = accuracy
+                stale_epochs = 0
+            else:
+                stale_epochs += 1
+            stop = bool(patience) and stale_epochs >= patience
+
+            if main_process:
+                files = {}
+                if improved:
+                    files[save_path] = base_model.state_dict()
+                    save_stats(
+                        base_model, best_accuracy, train_samples + total, stats_path,
+                        training_precision=precision,
+                        effective_batch_size=effective_batch_size,
+                        train_samples_per_second=round(throughput, 1),
+                        world_size=world_size(),
+                        **data_stats,
+                    )
+                    print(f" Model Saved! (New Best Accuracy: {best_accuracy:.2f}%)")
+                files[checkpoint_path] = checkpoint_state(epoch + 1, 0, finished=stop or epoch + 1 == EPOCHS)
+                writer.save(files)
+
+            if stop:
+                if main_process:
+                    print(f" No improvement for {stale_epochs} epochs, stopping early.")
+                break
+    finally:
+        writer.wait()
+
+def train_frozen(head_epochs=HEAD_EPOCHS, snapshot=None, loader_options=None, variant=VARIANT):
+    """
+    Frozen-backbone training: run BERT and ResNet once over the dataset,
+    cache their features in FEATURE_DIR and train only `model.classifier`
+    on them. The saved checkpoint is a full FakeNewsClassifier state_dict
+    (pretrained backbones + trained head), so FakeNewsPredictor loads it as is.
+    """
+    device = get_device()
+    save_path, stats_path = variant_paths(variant)
+
+    rows = load_rows(snapshot)
+    data_stats = {**snapshot_stats(snapshot), **watermark_stats(snapshot, rows)}
+
+    model = FakeNewsClassifier.from_variant(variant)
+    model.to(device)
+
+    feature_meta = {"text_backbone": model.text_backbone, "image_backbone": model.image_backbone, "max_len": MAX_SEQ_LEN}
+    row_ids = [str(row['id']) for row in rows]
+
+    store = None
+    if os.path.exists(os.path.join(FEATURE_DIR, "meta.json")):
+        store = FeatureStore(FEATURE_DIR)
+        if not store.covers(row_ids, feature_meta):
+            store = None
+
+    if store is None:
+        print(" Extracting backbone features (one pass over the dataset)...")
+        dataset = build_dataset(rows)
+        loader = DataLoader(
+            dataset,
+            batch_sampler=LengthBucketBatchSampler(dataset.lengths(), BATCH_SIZE * 2, shuffle=False),
+            **(loader_options or loader_kwargs()),
+        )
+        store = FeatureStore.extract(model, loader, FEATURE_DIR, device, feature_meta)
+    else:
+        print(f" Reusing cached features from {FEATURE_DIR}")
+
+    text_features, image_features = store.tensors(row_ids)
+    labels = torch.tensor([1 if row['label'] == 'fake' else 0 for row in rows], dtype=torch.long)
+
+    generator = torch.Generator().manual_seed(SPLIT_SEED)
+    order = torch.randperm(len(rows), generator=generator)
+    train_size = int(0.8 * len(rows))
+    # The same permutation split_dataset's random_split draws, so the head is
+    # validated on the rows --mode finetune holds out.
+    train_idx, val_idx = order[:train_size], order[train_size:]
+    data_stats.update(split_stats(rows, val_idx.tolist()))
+
+    train_loader = DataLoader(
+        TensorDataset(text_features[train_idx], image_features[train_idx], labels[train_idx]),
+        batch_size=HEAD_BATCH_SIZE, shuffle=True,
+    )
+    val_text = text_features[val_idx].to(device)
+    val_image = image_features[val_idx].to(device)
+    val_labels = labels[val_idx].to(device)
+
+    print(f" Training head on {len(train_idx)} samples, Validating on {len(val_idx)} samples.")
+
+    head = model.classifier
+    optimizer = torch.optim.AdamW(head.parameters(), lr=HEAD_LEARNING_RATE)
+    criterion = nn.CrossEntropyLoss()
+
+    best_accuracy = 0.0
+    best_head = None
+
+    for epoch in range(head_epochs):
+        head.train()
         total_loss = 0
+        for text_out, image_out, batch_labels in train_loader:
+            outputs = model.classify(text_out.to(device), image_out.to(device))
+            loss = criterion(outputs, batch_labels.to(device))
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+
+        head.eval()
+        with torch.no_grad():
+            predicted = model.classify(val_text, val_image).argmax(dim=1)
+            accuracy = 100 * (predicted == val_labels).float().mean().item()
+
+        if accuracy > best_accuracy:
+            best_accuracy = accuracy
+            best_head = {k: v.detach().clone() for k, v in head.state_dict().items()}
+            print(f" Epoch {epoch + 1}/{head_epochs} | Loss: {total_loss / len(train_loader):.4f} | New Best Accuracy: {accuracy:.2f}%")
+
+    if best_head is None:
+        print(" Head never improved on validation, nothing saved.")
+        return
+
+    head.load_state_dict(best_head)
+    save_atomic(model.state_dict(), save_path)
+    save_stats(model, best_accuracy, len(rows), stats_path, training_mode="frozen-backbone", **data_stats)
+    print(f" Model Saved! (Best Accuracy: {best_accuracy:.2f}%)")
+
+def train_incremental(epochs=INCREMENTAL_EPOCHS, replay_ratio=REPLAY_RATIO, loader_options=None, precision=PRECISION,
+                      variant=VARIANT):
+    """
+    Continue training the variant's current best_model.pth on the rows added
+    since the data_watermark in its model_stats.json, mixed with a random
+    replay sample of older rows. New and replayed rows are split into
+    train/val by a hash of their id; the updated model replaces
+    best_model.pth only if it scores at least as well as the current one on
+    that same validation set.
+    """
+    save_path, stats_path = variant_paths(variant)
+    stats = load_stats(stats_path)
+    watermark = stats.get("data_watermark")
+    if not watermark or not os.path.exists(save_path):
+        print(f" No {save_path} with a data_watermark in {stats_path}, run a full training first.")
+        return
+
+    device = get_device()
+    precision = resolve_precision(precision, device)
+
+    new_rows, replay_rows = asyncio.run(get_incremental_rows(datetime.fromisoformat(watermark), replay_ratio))
+    if not new_rows:
+        print(f" No rows added since {watermark}, nothing to do.")
+        return
+    print(f" Found {len(new_rows)} new samples since {watermark}, replaying {len(replay_rows)} older ones.")
+
+    rows = new_rows + replay_rows
+    train_rows = [row for row in rows if split_of(row['id'], VAL_FRACTION, SPLIT_SEED) == "train"]
+    val_rows = [row for row in rows if split_of(row['id'], VAL_FRACTION, SPLIT_SEED) == "val"]
+    if not train_rows or not val_rows:
+        print(" Too few new samples to hold out a validation set, waiting for more.")
+        return
+
+    loader_options = loader_options or loader_kwargs()
+
+    def build_loader(split_rows, shuffle):
+        dataset = build_dataset(split_rows)
+        sampler = LengthBucketBatchSampler(dataset.lengths(), BATCH_SIZE, shuffle=shuffle)
+        return DataLoader(dataset, batch_sampler=sampler, **loader_options)
+
+    train_loader = build_loader(train_rows, shuffle=True)
+    val_loader = build_loader(val_rows, shuffle=False)
+    print(f" Training on {len(train_rows)} samples, Validating on {len(val_rows)} samples.")
+
+    model = load_checkpoint_weights(save_path)
+    model.to(device)
+
+    correct, total = evaluate(model, val_loader, device, precision)
+    baseline = 100 * correct / total
+    print(f" Current model: {baseline:.2f}% validation accuracy")
+
+    optimizer = torch.optim.AdamW(model.parameters(), lr=INCREMENTAL_LEARNING_RATE)
+    criterion = nn.CrossEntropyLoss()
 
-        loop = tqdm(train_loader, leave=True)
-        for batch in loop:
+    accuracy = baseline
+    for epoch in range(epochs):
+        model.train()
+        train_loader.batch_sampler.set_epoch(epoch)
+        total_loss = 0
+        for batch in tqdm(train_loader, leave=True):
             input_ids = batch['input_ids'].to(device)
             attention_mask = batch['attention_mask'].to(device)
             images = batch['image'].to(device)
             labels = batch['label'].to(device)
 
-            outputs = model(input_ids, attention_mask, images)
-            loss = criterion(outputs, labels)
+            with autocast(device, precision):
+                outputs = model(input_ids, attention_mask, images)
+            loss = criterion(outputs.float(), labels)
 
             optimizer.zero_grad()
             loss.backward()
             optimizer.step()
-
             total_loss += loss.item()
-            loop.set_description(f"Loss: {loss.item():.4f}")
 
-        avg_train_loss = total_loss / len(train_loader)
-        print(f" Average Train Loss: {avg_train_loss:.4f}")
+        correct, total = evaluate(model, val_loader, device, precision)
+        accuracy = 100 * correct / total
+        print(f" Epoch {epoch + 1}/{epochs} | Loss: {total_loss / len(train_loader):.4f} | Accuracy: {accuracy:.2f}%")
 
-        model.eval()
-        correct = 0
-        total = 0
+    if accuracy < baseline:
+        print(f" Validation regressed ({baseline:.2f}% -> {accuracy:.2f}%), keeping the current model.")
+        return
 
-        with torch.no_grad(): 
-            for batch in val_loader:
-                input_ids = batch['input_ids'].to(device)
-                attention_mask = batch['attention_mask'].to(device)
-                images = batch['image'].to(device)
-                labels = batch['label'].to(device)
+    # Written next to the old model and renamed over it, so a crash never
+    # leaves the server a half-written best_model.pth.
+    save_atomic(model.state_dict(), save_path)
+    save_stats(
+        model, accuracy, stats.get("total_samples", 0) + len(new_rows), stats_path,
+        training_mode="incremental",
+        baseline_accuracy=round(baseline, 2),
+        incremental_samples=len(new_rows),
+        replay_samples=len(replay_rows),
+        data_watermark=max(row['created_at'] for row in new_rows).isoformat(),
+    )
+    print(f" Model Promoted! ({baseline:.2f}% -> {accuracy:.2f}%)")
 
-                outputs = model(input_ids, attention_mask, images)
+def load_teacher(teacher_path):
+    if is_artifact(teacher_path):
+        return load_artifact(teacher_path)[0]
+    return load_checkpoint_weights(teacher_path)
+
+def train_distill(teacher_path=TEACHER_PATH, teacher_stats_path=TEACHER_STATS_PATH, epochs=DISTILL_EPOCHS, temperature=DISTILL_TEMPERATURE,
+                  alpha=DISTILL_ALPHA, snapshot=None, loader_options=None, precision=PRECISION,
+                  variant=DISTILL_STUDENT):
+    """
+    Knowledge distillation: the frozen teacher (best_model.pth, BERT +
+    ResNet50) scores every training row once, its logits are cached in
+    TEACHER_LOGITS_DIR, and the student variant is trained on a mix of those
+    soft targets and the hard labels. Train/val use the same seeded split
+    as --mode finetune; the teacher's accuracy only counts as held-out when
+    its model_stats.json records that same validation set, otherwise the
+    report flags it as possibly contaminated. The best student goes to the
+    variant's best_model*.pth, and a teacher-vs-student accuracy/latency
+    report to DISTILL_REPORT_PATH.
+    """
+    if not os.path.exists(teacher_path):
+        print(f" No teacher at {teacher_path}, train the full model first.")
+        return
+
+    device = get_device()
+    precision = resolve_precision(precision, device)
+    save_path, stats_path = variant_paths(variant)
+    loader_options = loader_options or loader_kwargs()
+
+    rows = load_rows(snapshot)
+    data_stats = {**snapshot_stats(snapshot), **watermark_stats(snapshot, rows)}
+    train_dataset, val_dataset = split_dataset(build_dataset(rows))
+    train_ids = [str(rows[i]['id']) for i in train_dataset.indices]
+    data_stats.update(split_stats(rows, val_dataset.indices))
+
+    # A teacher trained with --stream, --mode incremental, another snapshot or
+    # an older table saw a different split, and may have trained on our val rows.
+    teacher_split = load_stats(teacher_stats_path).get("validation_ids_hash")
+    teacher_held_out = teacher_split == ids_hash(data_stats["validation_ids"])
+    if not teacher_held_out:
+        print(f" {teacher_stats_path} does not record this validation split; the teacher's "
+              "accuracy below may include rows it was trained on.")
+
+    teacher = load_teacher(teacher_path)
+    teacher.to(device)
+    teacher_meta = {"teacher": teacher_fingerprint(teacher_path), "max_len": MAX_SEQ_LEN}
+
+    store = None
+    if os.path.exists(os.path.join(TEACHER_LOGITS_DIR, "meta.json")):
+        store = TeacherLogitStore(TEACHER_LOGITS_DIR)
+        if not store.covers(train_ids, teacher_meta):
+            store = None
+
+    if store is None:
+        print(" Scoring the training rows with the teacher (one pass)...")
+        loader = subset_loader(train_dataset, False, loader_options, batch_size=BATCH_SIZE * 2)
+        store = TeacherLogitStore.extract(teacher, loader, TEACHER_LOGITS_DIR, device, teacher_meta, precision)
+    else:
+        print(f" Reusing cached teacher logits from {TEACHER_LOGITS_DIR}")
+
+    train_loader = subset_loader(train_dataset, True, loader_options)
+    val_loader = subset_loader(val_dataset, False, loader_options)
+    print(f" Training on {len(train_dataset)} samples, Validating on {len(val_dataset)} samples.")
+
+    teacher_report = {
+        **measure(teacher, val_loader, device, precision), **teacher.describe(),
+        "path": teacher_path, "held_out": teacher_held_out,
+    }
+    print(f" Teacher ({teacher_report['model_version']}): {teacher_report['accuracy']:.2f}% validation accuracy")
+    # Only the cached logits are needed from here on.
+    del teacher
+
+    student = FakeNewsClassifier.from_variant(variant)
+    student.to(device)
+    print(f" Student: {variant} ({MODEL_VARIANTS[variant]['label']}) -> {save_path}")
 
-                _, predicted = torch.max(outputs, 1)
-                total += labels.size(0)
-                correct += (predicted == labels).sum().item()
+    optimizer = torch.optim.AdamW(student.parameters(), lr=DISTILL_LEARNING_RATE)
 
+    best_accuracy = 0.0
+    for epoch in range(epochs):
+        student.train()
+        train_loader.batch_sampler.set_epoch(epoch)
+        total_loss = 0
+        for batch in tqdm(train_loader, leave=True):
+            input_ids = batch['input_ids'].to(device)
+            attention_mask = batch['attention_mask'].to(device)
+            images = batch['image'].to(device)
+            labels = batch['label'].to(device)
+            teacher_logits = store.tensor(batch['id']).to(device)
+
+            with autocast(device, precision):
+                outputs = student(input_ids, attention_mask, images)
+            loss = distillation_loss(outputs.float(), teacher_logits, labels, temperature, alpha)
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+
+        correct, total = evaluate(student, val_loader, device, precision)
         accuracy = 100 * correct / total
-        print(f" Validation Accuracy: {accuracy:.2f}%")
+        print(f" Epoch {epoch + 1}/{epochs} | Loss: {total_loss / len(train_loader):.4f} | Accuracy: {accuracy:.2f}%")
 
         if accuracy > best_accuracy:
             best_accuracy = accuracy
-            torch.save(model.state_dict(), SAVE_PATH)
-            print("📝 Saving training statistics...")
-            stats = {
-                "accuracy": round(best_accuracy, 2), 
-                "last_trained": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "total_samples": len(train_dataset) + len(val_dataset),
-                "model_version": "ResNet50 + BERT (v1.1)",
-                "architecture": "Multimodal (Image + Text)",
-            }
-            with open("model_stats.json", "w") as f:
-                json.dump(stats, f, indent=4)
-            print(" Stats saved to model_stats.json")
+            save_atomic(student.state_dict(), save_path)
+            save_stats(
+                student, best_accuracy, len(rows), stats_path,
+                training_mode="distillation",
+                teacher_path=os.path.abspath(teacher_path),
+                teacher_accuracy=teacher_report["accuracy"],
+                teacher_held_out=teacher_held_out,
+                distill_temperature=temperature,
+                distill_alpha=alpha,
+                training_precision=precision,
+                **data_stats,
+            )
             print(f" Model Saved! (New Best Accuracy: {best_accuracy:.2f}%)")
 
+    if not best_accuracy:
+        print(" Student never improved on validation, nothing saved.")
+        return
+
+    student = load_checkpoint_weights(save_path)
+    student.to(device)
+    student_report = measure(student, val_loader, device, precision)
+
+    report = {
+        "teacher": teacher_report,
+        "student": {**student_report, **student.describe(), "path": save_path},
+        "accuracy_gap": round(teacher_report["accuracy"] - student_report["accuracy"], 2),
+        "speedup_per_sample": round(teacher_report["ms_per_sample"] / student_report["ms_per_sample"], 2),
+        "validation_samples": len(val_dataset),
+        "device": device.type,
+        "precision": precision,
+    }
+    with open(DISTILL_REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"\n {'':8} {'accuracy':>9} {'ms/sample':>10} {'ms/request':>11} {'params':>12}")
+    for name in ("teacher", "student"):
+        r = report[name]
+        print(f" {name:8} {r['accuracy']:>8.2f}% {r['ms_per_sample']:>10.2f} {r['ms_per_request']:>11.2f} {r['parameters']:>12,}")
+    if not teacher_held_out:
+        print(" (teacher accuracy possibly contaminated: its validation split is not recorded as this one)")
+    print(f" Report saved to {DISTILL_REPORT_PATH}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the multimodal fake news classifier")
+    parser.add_argument(
+        "--mode", choices=["finetune", "frozen", "incremental", "distill"], default="finetune",
+        help="finetune: train BERT + ResNet + head end to end; "
+             "frozen: cache backbone features once and train only the head; "
+             "incremental: continue best_model.pth on rows added since the last run; "
+             "distill: train a small student against the frozen best_model.pth teacher",
+    )
+    parser.add_argument(
+        "--variant", choices=sorted(MODEL_VARIANTS), default=None,
+        help=f"full: BERT + ResNet50; small: DistilBERT + ResNet18 (best_model_small.pth). "
+             f"Default: {VARIANT}, or {DISTILL_STUDENT} as the --mode distill student",
+    )
+    parser.add_argument("--head-epochs", type=int, default=HEAD_EPOCHS)
+    parser.add_argument("--incremental-epochs", type=int, default=INCREMENTAL_EPOCHS)
+    parser.add_argument(
+        "--replay-ratio", type=float, default=REPLAY_RATIO,
+        help="older rows replayed per new row in --mode incremental",
+    )
+    parser.add_argument(
+        "--teacher", default=TEACHER_PATH,
+        help="teacher weights for --mode distill (best_model.pth or a .safetensors artifact)",
+    )
+    parser.add_argument(
+        "--teacher-stats", default=TEACHER_STATS_PATH,
+        help="the teacher's model_stats.json, used to check its validation split",
+    )
+    parser.add_argument("--distill-epochs", type=int, default=DISTILL_EPOCHS)
+    parser.add_argument(
+        "--temperature", type=float, default=DISTILL_TEMPERATURE,
+        help="softens teacher and student logits in the distillation loss",
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=DISTILL_ALPHA,
+        help="weight of the soft-target loss; the hard-label loss gets 1 - alpha",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="finetune on the full dataset_samples table streamed from Postgres",
+    )
+    parser.add_argument(
+        "--snapshot", nargs="?", const=SNAPSHOT_PATH, default=None,
+        help=f"read rows from a Parquet snapshot instead of Postgres (default path: {SNAPSHOT_PATH})",
+    )
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="DataLoader worker processes (0 = main process)")
+    parser.add_argument("--prefetch-factor", type=int, default=PREFETCH_FACTOR, help="batches each worker loads ahead")
+    parser.add_argument("--persistent-workers", action=argparse.BooleanOptionalAction, default=PERSISTENT_WORKERS)
+    parser.add_argument("--pin-memory", action=argparse.BooleanOptionalAction, default=PIN_MEMORY)
+    parser.add_argument(
+        "--precision", choices=["fp32", "bf16"], default=PRECISION,
+        help="bf16: autocast forward passes to bfloat16 (finetune, incremental and distill modes, CPUs with AVX512-BF16/AMX)",
+    )
+    parser.add_argument(
+        "--accum-steps", type=int, default=ACCUM_STEPS,
+        help=f"batches of {BATCH_SIZE} per optimizer step (finetune mode)",
+    )
+    parser.add_argument(
+        "--resume", nargs="?", const=CHECKPOINT_PATH, default=None,
+        help=f"continue from a full checkpoint (finetune mode, default path: {CHECKPOINT_PATH}); "
+             "starts fresh when it does not exist yet, so preempted jobs can rerun the same command",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+        help="also checkpoint every N optimizer steps, not only at the end of each epoch",
+    )
+    parser.add_argument(
+        "--patience", type=int, default=PATIENCE,
+        help="stop after N epochs without a better validation accuracy (0 = never)",
+    )
+    args = parser.parse_args()
+    if args.accum_steps < 1:
+        parser.error("--accum-steps must be at least 1")
+    if args.stream and args.snapshot:
+        parser.error("--stream and --snapshot are mutually exclusive")
+    if args.mode == "incremental" and (args.stream or args.snapshot):
+        parser.error("--mode incremental reads new rows from Postgres, not --stream or --snapshot")
+    if args.mode == "distill" and args.stream:
+        parser.error("--mode distill reads rows from Postgres or --snapshot, not --stream")
+    if not 0 <= args.alpha <= 1:
+        parser.error("--alpha must be between 0 and 1")
+    args.variant = args.variant or (DISTILL_STUDENT if args.mode == "distill" else VARIANT)
+    if args.mode == "distill" and os.path.abspath(variant_paths(args.variant)[0]) == os.path.abspath(args.teacher):
+        parser.error(f"--variant {args.variant} would overwrite the teacher {args.teacher}")
+    if int(os.environ.get("WORLD_SIZE", "1")) > 1 and (args.stream or args.mode != "finetune"):
+        parser.error("distributed (torchrun) training supports --mode finetune without --stream only")
+    return args
+
 if __name__ == "__main__":
-    train()
+    args = parse_args()
+    init_distributed()
+    loader_options = loader_kwargs(
+        workers=args.workers,
+        persistent_workers=args.persistent_workers,
+        prefetch_factor=args.prefetch_factor,
+        pin_memory=args.pin_memory,
+    )
+    try:
+        if args.mode == "frozen":
+            train_frozen(
+                head_epochs=args.head_epochs, snapshot=args.snapshot, loader_options=loader_options,
+                variant=args.variant,
+            )
+        elif args.mode == "distill":
+            train_distill(
+                teacher_path=args.teacher, teacher_stats_path=args.teacher_stats, epochs=args.distill_epochs,
+                temperature=args.temperature, alpha=args.alpha,
+                snapshot=args.snapshot, loader_options=loader_options,
+                precision=args.precision, variant=args.variant,
+            )
+        elif args.mode == "incremental":
+            train_incremental(
+                epochs=args.incremental_epochs, replay_ratio=args.replay_ratio,
+                loader_options=loader_options, precision=args.precision, variant=args.variant,
+            )
+        else:
+            train(
+                stream=args.stream, snapshot=args.snapshot, loader_options=loader_options,
+                precision=args.precision, accum_steps=args.accum_steps,
+                resume=args.resume, checkpoint_every=args.checkpoint_every, patience=args.patience,
+                variant=args.variant,
+            )
+    finally:
+        cleanup_distributed()
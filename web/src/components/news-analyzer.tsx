@@ -1,6 +1,6 @@
 "use client";
 
-import { useState } from "react";
+import { useRef, useState } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
@@ -16,7 +16,9 @@ import {
   FileText,
   Loader2
 } from "lucide-react";
-import { PredictionResult, predictNews, predictUrl } from "../services/api";
+import { PredictionResult, predictNews, predictUrl, waitForSummary } from "../services/api";
+
+const SUMMARY_UNAVAILABLE = "Analysis unavailable at the moment.";
 
 const fadeInUp = {
   initial: { opacity: 0, y: 20 },
@@ -43,8 +45,20 @@ export function NewsAnalyzer({ onScanComplete, userId, onError }: NewsAnalyzerPr
   const [loading, setLoading] = useState(false);
   const [activeTab, setActiveTab] = useState("url");
   const [result, setResult] = useState<(PredictionResult & { scraped_headline?: string }) | null>(null);
+  // Bumped on every analysis, so a summary poll for an older result stops.
+  const latestRequest = useRef(0);
+
+  const pollSummary = async (scanId: string, request: number) => {
+    const summary = await waitForSummary(scanId, () => latestRequest.current !== request);
+    if (latestRequest.current !== request) return;
+
+    setResult((current) => current && { ...current, summary: summary ?? SUMMARY_UNAVAILABLE, summary_status: "ready" });
+    // Refresh the history so the saved scan shows its summary too.
+    if (summary && onScanComplete) onScanComplete();
+  };
 
   const handlePredict = async () => {
+    const request = ++latestRequest.current;
     setLoading(true);
     setResult(null);
 
@@ -61,6 +75,9 @@ export function NewsAnalyzer({ onScanComplete, userId, onError }: NewsAnalyzerPr
 
       setResult(data);
       if (onScanComplete) onScanComplete();
+      if (data.summary_status === "pending" && data.scan_id) {
+        pollSummary(data.scan_id, request);
+      }
     } catch (err: unknown) {
       console.error(err);
       const errorMessage = err instanceof Error ? err.message : "Error analyzing news.";
@@ -281,7 +298,7 @@ export function NewsAnalyzer({ onScanComplete, userId, onError }: NewsAnalyzerPr
                     </div>
                   </motion.div>
 
-                  {result.summary && (
+                  {(result.summary || result.summary_status === "pending") && (
                     <motion.div
                       className="mb-5 p-5 bg-white/80 backdrop-blur-sm rounded-xl border border-slate-200 shadow-sm"
                       initial={{ opacity: 0, y: 10 }}
@@ -292,9 +309,16 @@ export function NewsAnalyzer({ onScanComplete, userId, onError }: NewsAnalyzerPr
                         <div className="w-1.5 h-1.5 rounded-full bg-blue-500"></div>
                         AI-Generated Assessment
                       </h4>
-                      <p className="leading-relaxed text-slate-700 text-sm">
-                        {result.summary}
-                      </p>
+                      {result.summary ? (
+                        <p className="leading-relaxed text-slate-700 text-sm">
+                          {result.summary}
+                        </p>
+                      ) : (
+                        <p className="flex items-center gap-2 text-slate-500 text-sm">
+                          <Loader2 className="w-4 h-4 animate-spin" />
+                          Generating assessment...
+                        </p>
+                      )}
                     </motion.div>
                   )}
 
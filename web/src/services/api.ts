@@ -5,7 +5,9 @@ export interface PredictionResult {
   confidence: number;
   fake_probability: number;
   scraped_headline?: string;
-  summary?: string;
+  summary?: string | null;
+  summary_status?: "pending" | "ready";
+  scan_id?: string | null;
 }
 
 export async function predictNews(text: string, imageFile: File, userId: string): Promise<PredictionResult> {
@@ -44,6 +46,40 @@ export async function predictUrl(url: string, userId: string): Promise<Predictio
   return response.json();
 }
 
+export interface SummaryResult {
+  scan_id: string;
+  summary: string | null;
+  summary_status: "pending" | "ready";
+}
+
+export async function fetchSummary(scanId: string): Promise<SummaryResult> {
+  const response = await fetch(`${API_URL}/summary/${scanId}`);
+  if (!response.ok) throw new Error("Failed to load summary");
+  return response.json();
+}
+
+// Polls GET /summary/{scanId} for a summary the API deferred
+// (LLM_DEFERRED_SUMMARIES=1). Resolves to null when it is not ready within
+// timeoutMs or isCancelled() turns true.
+export async function waitForSummary(
+  scanId: string,
+  isCancelled: () => boolean = () => false,
+  intervalMs = 1500,
+  timeoutMs = 30000,
+): Promise<string | null> {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline && !isCancelled()) {
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    try {
+      const data = await fetchSummary(scanId);
+      if (data.summary_status === "ready") return data.summary;
+    } catch (err) {
+      console.error("Failed to poll summary:", err);
+    }
+  }
+  return null;
+}
+
 export async function fetchHistory(userId: string) {
   const response = await fetch(`${API_URL}/history?user_id=${userId}`);
   if (!response.ok) throw new Error("Failed to load history");